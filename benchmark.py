@@ -0,0 +1,380 @@
+"""
+Benchmark suite for the hot paths of the project: get_probs, location compositions, fish filtering, and loading game data.
+Everything runs against synthetic game data generated into a temporary directory, so no game install is needed
+and results are comparable between machines/runs. Results are saved as JSON, and can be compared against a stored baseline.
+
+Usage:
+python benchmark.py run [output.json]
+Run every benchmark, print the results, and save them (default benchmark_results.json)
+
+python benchmark.py baseline [baseline.json]
+Same as run, but saves the results as the baseline to compare against (default benchmark_baseline.json)
+
+python benchmark.py compare [results.json] [baseline.json]
+Compare saved results against the baseline. Exits with 1 if anything got slower than REGRESSION_TOLERANCE allows.
+If no results file exists yet, runs the benchmarks first.
+
+python benchmark.py check
+Check the streamed JSON reader (iter_file_json_records) against json.load on the synthetic data, at a bunch of chunk sizes.
+Exits with 1 if any of them read something different.
+Copyright (C) 2024 Romayne (Contact @ https://github.com/MyNameIsRomayne)
+"""
+
+import dataclasses
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+FILE_RESULTS  = "benchmark_results.json"
+FILE_BASELINE = "benchmark_baseline.json"
+
+# How much slower (as a fraction) a benchmark can be than the baseline before it counts as a regression
+REGRESSION_TOLERANCE = 0.25
+# Benchmarks faster than this (in seconds) are too noisy to flag as regressions
+REGRESSION_MIN_SECONDS = 0.0005
+
+# Chunk sizes to read the synthetic data with when checking iter_file_json_records. The small ones split most numbers
+JSON_CHECK_CHUNK_SIZES = [1, 2, 3, 4, 5, 7, 11, 64, 1 << 20]
+
+# Sizes of get_probs to time
+PROB_LIST_SIZES = list(range(1, 10)) + list(range(10, 201, 10))
+
+# Synthetic data sizes
+FIXTURE_SEED               = 1
+FIXTURE_FISH               = 150
+FIXTURE_LOCATIONS          = 12
+FIXTURE_FISH_PER_LOCATION  = 20
+FIXTURE_MODDED_LOCATION    = "Modded"
+FIXTURE_MODDED_FISH        = 120
+
+# Fields every Locations.json fish entry needs
+FISH_LOCATION_DEFAULTS = {
+    "Chance": 1, "Season": None, "FishAreaId": None, "MinFishingLevel": 0, "ApplyDailyLuck": False, "CuriosityLureBuff": -1,
+    "SpecificBaitBuff": 0, "SpecificBaitMultiplier": 1.66, "IsBossFish": False, "RequireMagicBait": False,
+    "MinDistanceFromShore": 0, "MaxDistanceFromShore": -1, "Precedence": 0, "IgnoreFishDataRequirements": False,
+    "CanBeInherited": True, "SetFlagOnCatch": None, "ChanceModifiers": None, "ChanceModifierMode": "Stack",
+    "ChanceBoostPerLuckLevel": 0, "Quality": -1, "Condition": None, "Id": None,
+    "BobberPosition": None, "PlayerPosition": None, "CatchLimit": -1, "CanUseTrainingRod": None,
+}
+
+# Fields every Objects.json entry needs
+BASE_OBJECT_DEFAULTS = {
+    "Name": None, "DisplayName": "", "Description": "", "Type": "Fish", "Category": -4, "Price": 0, "Texture": None,
+    "SpriteIndex": 0, "Edibility": -300, "IsDrink": False, "Buffs": None, "GeodeDropsDefaultItems": False, "GeodeDrops": None,
+    "ArtifactSpotChances": None, "ExcludeFromFishingCollection": False, "ExcludeFromShippingCollection": False,
+    "ExcludeFromRandomSale": False, "ContextTags": None, "CustomFields": None,
+}
+
+def make_fish_location(item_id:str, **fields) -> dict:
+    fish_location = dict(FISH_LOCATION_DEFAULTS)
+    fish_location["Id"] = item_id
+    fish_location.update(fields)
+    return fish_location
+
+def make_base_object(name:str, **fields) -> dict:
+    base_object = dict(BASE_OBJECT_DEFAULTS)
+    base_object["Name"] = name
+    base_object.update(fields)
+    return base_object
+
+def write_fixtures(content_dir:str) -> list[str]:
+    """
+    Write a synthetic Objects/Fish/Locations/Furniture.json into content_dir, shaped like the real unpacked content.
+    Returns the names of the generated locations.
+    """
+    rng = random.Random(FIXTURE_SEED)
+    objects, fish, furniture, locations = {}, {}, {}, {}
+
+    # Fish, with their Objects.json entries
+    fish_ids = [str(100000 + i) for i in range(FIXTURE_FISH)]
+    for i, fish_id in enumerate(fish_ids):
+        tags = [f"season_{rng.choice(['spring', 'summer', 'fall', 'winter'])}", "fish_river"]
+        if i % 40 == 0:
+            tags.append("fish_legendary")
+        objects[fish_id] = make_base_object(f"Fish {fish_id}", Price=rng.randint(20, 800), ContextTags=tags)
+        start_time = rng.choice([600, 900, 1200, 1800])
+        end_time = min(2600, start_time + rng.choice([300, 600, 1000]))
+        weather = rng.choice(["sunny", "rainy", "both", "both"])
+        fish[fish_id] = "/".join([
+            f"Fish {fish_id}", str(rng.randint(15, 110)), rng.choice(["mixed", "dart", "smooth", "sinker", "floater"]),
+            str(rng.randint(1, 20)), str(rng.randint(21, 80)), f"{start_time} {end_time}", "spring summer fall winter",
+            weather, "690 .4 685 .1", str(rng.randint(0, 5)), f"{rng.uniform(0.05, 0.6):.2f}", f"{rng.uniform(0.05, 0.2):.2f}",
+            str(rng.randint(0, 8)), "false",
+        ])
+    # Trap fish, trash, and other odds and ends the real data has
+    objects["900001"] = make_base_object("Trap Fish", Price=100, ContextTags=[])
+    fish["900001"] = "Trap Fish/trap/.05/688 .45 689 .35/ocean/2/20/false"
+    trash_ids = [str(900100 + i) for i in range(6)]
+    for trash_id in trash_ids:
+        objects[trash_id] = make_base_object(f"Trash {trash_id}", Type="Basic", Category=-20, Price=rng.randint(0, 20))
+    objects["79"] = make_base_object("Secret Note", Type="asdf", Category=0, Price=1)
+    furniture["9001"] = "Trash Can/decor/1 2/1 1/1/500/-1/Trash Can/0"
+
+    # Default location, which everything inherits from
+    locations["Default"] = {"Fish": [
+        make_fish_location("SECRET_NOTE_OR_ITEM", Precedence=-50, Chance=0.03),
+        make_fish_location("|".join([f"(O){trash_id}" for trash_id in trash_ids]), Precedence=1000, IgnoreFishDataRequirements=True),
+        make_fish_location(f"(O){fish_ids[0]}", Precedence=10, Chance=0.2, Condition="LOCATION_SEASON Here spring fall"),
+    ], "FishAreas": {}}
+
+    # Everywhere else
+    conditions = [None, None, None, "LOCATION_SEASON Here spring summer", "WEATHER Here rain storm",
+                  "LOCATION_SEASON Here fall winter, WEATHER Here sun", "LEGENDARY_FAMILY", "IS_PASSIVE_FESTIVAL_OPEN Fest"]
+    location_names = [f"Location{i}" for i in range(FIXTURE_LOCATIONS)] + [FIXTURE_MODDED_LOCATION]
+    for name in location_names:
+        areas = {} if (rng.random() < 0.5) else {f"Area{i}": {} for i in range(rng.randint(1, 3))}
+        amount_fish = FIXTURE_MODDED_FISH if (name == FIXTURE_MODDED_LOCATION) else FIXTURE_FISH_PER_LOCATION
+        location_fish = []
+        for fish_id in rng.sample(fish_ids, amount_fish):
+            location_fish.append(make_fish_location(
+                f"(O){fish_id}",
+                FishAreaId=rng.choice([None] + list(areas.keys())),
+                Chance=rng.choice([1, 1, 0.5, 0.8]),
+                Precedence=rng.choice([0, 0, 0, -10, 10]),
+                Condition=rng.choice(conditions),
+                Season=rng.choice([None, None, None, "Spring"]),
+            ))
+        location_fish.append(make_fish_location(f"(O){trash_ids[0]}", Chance=0.3, IgnoreFishDataRequirements=True))
+        location_fish.append(make_fish_location("(F)9001", Chance=0.05, IgnoreFishDataRequirements=True))
+        location_fish.append(make_fish_location(f"(O){fish_ids[1]}", IsBossFish=True, Precedence=-20))
+        location_fish.append(make_fish_location(f"(O){fish_ids[2]}", SetFlagOnCatch="CaughtIt"))
+        locations[name] = {"Fish": location_fish, "FishAreas": areas}
+
+    for file_name, data in [("Objects.json", objects), ("Fish.json", fish), ("Locations.json", locations), ("Furniture.json", furniture)]:
+        with open(os.path.join(content_dir, file_name), "w") as file:
+            json.dump(data, file, indent=2)
+    return location_names
+
+def setup_fixture_environment() -> tuple[str, list[str]]:
+    """
+    Make a temporary game + data directory filled with synthetic data, and point config_paths at it.
+    Must be called before anything imports config_paths. Returns the temporary directory and the location names.
+    """
+    root = tempfile.mkdtemp(prefix="stardewfish_bench_")
+    game_dir = os.path.join(root, "Stardew Valley")
+    content_dir = os.path.join(game_dir, "Content (unpacked)", "Data")
+    data_dir = os.path.join(root, "data")
+    os.makedirs(content_dir)
+    os.makedirs(data_dir)
+    location_names = write_fixtures(content_dir)
+    with open(os.path.join(data_dir, "private_config.json"), "w") as file:
+        json.dump({"User": "benchmark", "StardewValleyDirectory": game_dir}, file)
+    # Keep settings the same no matter what the real public config says
+    with open(os.path.join(data_dir, "public_config.json"), "w") as file:
+        json.dump({"season": "spring", "weather": "sunny", "time": 1200, "fishinglevel": 8, "locations": location_names}, file)
+    os.environ["STARDEWFISH_DATA"] = data_dir
+    return root, location_names
+
+def time_function(func, repeats:int, setup = None) -> dict[str, float]:
+    """Time func repeats times (calling setup before each, untimed). Returns the best and median times in seconds."""
+    times = []
+    for _ in range(repeats):
+        if setup != None:
+            setup()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return {"seconds": times[0], "median": times[len(times)//2], "repeats": repeats}
+
+def run_game_benchmarks(record, location_names:list[str]) -> None:
+    """The part of the suite which needs game_object, i.e. loading game data and working out compositions."""
+    import config_paths
+    from stardewfish import game_object
+    from stardewfish.probs_cache import probs_cache
+    from stardewfish.sweep import get_day_profile
+    from stardewfish.best import find_best
+    from stardewfish.fish_query import get_fish_area_chances, get_many_fish_area_chances
+
+    # Loading game data, cold (no caches) and warm
+    def clear_data_caches():
+        if os.path.exists(str(config_paths.FILE_SNAPSHOT_GAMEDATA)):
+            os.remove(str(config_paths.FILE_SNAPSHOT_GAMEDATA))
+    # Datasets are loaded on first use, so time the first lookup of a single location rather than GameObject() itself
+    first_location = location_names[0]
+    record("first location lookup cold", lambda: game_object.GameObject().location_objects[first_location], repeats=3, setup=clear_data_caches)
+    record("first location lookup warm", lambda: game_object.GameObject().location_objects[first_location], repeats=5)
+    def load_everything():
+        new_game = game_object.GameObject()
+        for dataset in [new_game.base_objects, new_game.fish_objects, new_game.location_objects, new_game.furniture_objects]:
+            [dataset[key] for key in dataset]
+    record("load every dataset cold", load_everything, repeats=3, setup=clear_data_caches)
+    record("load every dataset warm", load_everything, repeats=5)
+
+    game = game_object.game
+    def clear_composition_caches():
+        probs_cache.clear()
+        game.stages.clear()
+    for name in location_names:
+        location = game.location_objects[name]
+        record(f"filter_catchable_fish {name}", lambda: game_object.filter_catchable_fish(location.fish))
+        record(f"get_area_composition {name}", lambda: location.get_area_composition(None), setup=clear_composition_caches)
+        record(f"get_composition {name}", lambda: location.get_composition(), setup=clear_composition_caches)
+    all_locations = [game.location_objects[name] for name in location_names]
+    record("get_compositions (all locations)", lambda: game_object.get_compositions(all_locations), setup=clear_composition_caches)
+    record("get_compositions (all locations, warm cache)", lambda: game_object.get_compositions(all_locations), setup=game.stages.clear)
+    # Only the time changing, so only the catchable stage is redone unless different fish come out of it
+    later = dataclasses.replace(game.scenario, time=game.scenario.time + 10 if (game.scenario.time % 100 < 50) else game.scenario.time + 50)
+    def warm_other_time():
+        clear_composition_caches()
+        game_object.get_compositions(all_locations, later)
+    record("get_compositions (all locations, time change)", lambda: game_object.get_compositions(all_locations), setup=warm_other_time)
+    record("get_day_profile (all locations)", lambda: get_day_profile(all_locations), setup=clear_composition_caches)
+    # Only the areas a fish can spawn in are worked out, rather than every composition of every location
+    fish_index = game.get_fish_index()
+    fish_id = next(item_id for item_id in fish_index.spawns if (item_id in game.fish_objects) and (item_id not in fish_index.inherited))
+    record("get_fish_area_chances (all locations, one fish)", lambda: get_fish_area_chances(fish_id, all_locations), setup=clear_composition_caches)
+    # Every fish at once, which should cost about as much as get_compositions since each composition is only worked out once
+    fish_ids = [item_id for item_id in game.fish_objects if not game.fish_objects[item_id].is_trap()]
+    record("get_many_fish_area_chances (all locations, every fish)", lambda: list(get_many_fish_area_chances(fish_ids, all_locations)),
+           setup=clear_composition_caches)
+    record("find_best (all locations, top 10)", lambda: find_best(all_locations), repeats=3, setup=clear_composition_caches)
+
+def run_benchmarks() -> dict:
+    """Run the whole suite against fresh synthetic data. Returns the results, ready to be saved as JSON."""
+    root, location_names = setup_fixture_environment()
+    results:dict[str, dict] = {}
+
+    def record(name:str, func, repeats:int = 5, setup = None):
+        try:
+            results[name] = time_function(func, repeats, setup)
+            print(f"{name.ljust(48)} {results[name]['seconds']*1000:10.3f} ms")
+        except Exception as exception:
+            # Keep going, a broken benchmark shouldn't hide the rest
+            results[name] = {"error": f"{type(exception).__name__}: {exception}"}
+            print(f"{name.ljust(48)} FAILED ({results[name]['error']})")
+
+    try:
+        import numpy as np
+        from stardewfish import probs_algorithm
+        from stardewfish.probs_cache import probs_cache
+
+        # get_probs, with the cache cleared each time so it's the actual work being timed
+        rng = np.random.default_rng(FIXTURE_SEED)
+        for size in PROB_LIST_SIZES:
+            prob_list = rng.random(size)
+            record(f"get_probs n={size}", lambda: probs_algorithm.get_probs(prob_list), repeats=7, setup=probs_cache.clear)
+        target_list = rng.random(50)
+        record("get_probs_with_target n=50", lambda: probs_algorithm.get_probs_with_target(target_list, 0), repeats=7, setup=probs_cache.clear)
+        batch = rng.random((500, 30))
+        record("get_probs_batched 500x30", lambda: probs_algorithm.get_probs_batched(batch), repeats=5, setup=probs_cache.clear)
+
+        # Everything past here needs the game data to load
+        try:
+            from stardewfish import game_object
+        except Exception as exception:
+            results["game data"] = {"error": f"{type(exception).__name__}: {exception}"}
+            print(f"Skipping game data benchmarks, could not load it ({results['game data']['error']})")
+            game_object = None
+        if game_object != None:
+            run_game_benchmarks(record, location_names)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    return {
+        "meta": {
+            "timestamp" : time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python"    : platform.python_version(),
+            "platform"  : platform.platform(),
+            "numpy"     : __import__("numpy").__version__,
+        },
+        "results": results,
+    }
+
+def check_json_records() -> list[str]:
+    """
+    Read every synthetic content file with iter_file_json_records at each of JSON_CHECK_CHUNK_SIZES, and compare what
+    comes out to json.load. The content files only have objects and strings at the top, so a file of plain numbers
+    (and the other scalars) is checked too, since those are what can get cut off between chunks.
+    Returns "file (chunk size)" for each read which didn't match.
+    """
+    from stardewfish.utils import iter_file_json_records
+    root = tempfile.mkdtemp(prefix="stardewfish_check_")
+    mismatches = []
+    try:
+        write_fixtures(root)
+        rng = random.Random(FIXTURE_SEED)
+        scalars = [0, 0.1, -0.5, 1.66, 12, -340, 1e-07, 2.5e+20, True, False, None, "0.1"]
+        scalars += [round(rng.uniform(-1000, 1000), rng.randint(0, 6)) for _ in range(100)]
+        scalars += [rng.uniform(-1, 1) * 10**rng.randint(-30, 30) for _ in range(100)]
+        with open(os.path.join(root, "Scalars.json"), "w") as file:
+            json.dump({f"Value{i}": value for i, value in enumerate(scalars)}, file)
+        for file_name in sorted(os.listdir(root)):
+            file_path = os.path.join(root, file_name)
+            expected = list(load_json(file_path).items())
+            for chunk_size in JSON_CHECK_CHUNK_SIZES:
+                try:
+                    matched = list(iter_file_json_records(file_path, chunk_size=chunk_size)) == expected
+                except json.JSONDecodeError:
+                    matched = False
+                print(f"{f'{file_name} (chunk size {chunk_size})'.ljust(48)} {'ok' if matched else 'MISMATCH'}")
+                if not matched:
+                    mismatches.append(f"{file_name} ({chunk_size})")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    return mismatches
+
+def compare_results(results:dict, baseline:dict) -> list[str]:
+    """Print each benchmark next to its baseline. Returns the names of those which regressed."""
+    regressions = []
+    for name, current in results["results"].items():
+        previous = baseline["results"].get(name)
+        if (previous == None) or ("seconds" not in previous) or ("seconds" not in current):
+            print(f"{name.ljust(48)} (no comparison)")
+            continue
+        ratio = current["seconds"] / max(previous["seconds"], 1e-12)
+        regressed = (ratio > 1 + REGRESSION_TOLERANCE) and (current["seconds"] > REGRESSION_MIN_SECONDS)
+        if regressed:
+            regressions.append(name)
+        print(f"{name.ljust(48)} {previous['seconds']*1000:10.3f} ms -> {current['seconds']*1000:10.3f} ms  ({ratio:5.2f}x){'  REGRESSION' if regressed else ''}")
+    return regressions
+
+def save_json(data:dict, file_path:str) -> None:
+    with open(file_path, "w") as file:
+        json.dump(data, file, indent=2)
+
+def load_json(file_path:str) -> dict:
+    with open(file_path, "r") as file:
+        return json.load(file)
+
+def main():
+    args = sys.argv
+    command = args[1] if (len(args) > 1) else "run"
+
+    if command == "run":
+        save_json(run_benchmarks(), args[2] if (len(args) > 2) else FILE_RESULTS)
+
+    elif command == "baseline":
+        save_json(run_benchmarks(), args[2] if (len(args) > 2) else FILE_BASELINE)
+
+    elif command == "compare":
+        results_path = args[2] if (len(args) > 2) else FILE_RESULTS
+        baseline_path = args[3] if (len(args) > 3) else FILE_BASELINE
+        if not os.path.exists(baseline_path):
+            print(f"No baseline found at {baseline_path}. Run `python benchmark.py baseline` first to make one.")
+            sys.exit(1)
+        if not os.path.exists(results_path):
+            save_json(run_benchmarks(), results_path)
+        regressions = compare_results(load_json(results_path), load_json(baseline_path))
+        if len(regressions):
+            print(f"\n{len(regressions)} regression(s) over {int(REGRESSION_TOLERANCE*100)}%: {', '.join(regressions)}")
+            sys.exit(1)
+        print("\nNo regressions.")
+
+    elif command == "check":
+        mismatches = check_json_records()
+        if len(mismatches):
+            print(f"\n{len(mismatches)} read(s) didn't match json.load: {', '.join(mismatches)}")
+            sys.exit(1)
+        print("\nEverything matched.")
+
+    else:
+        print("Invalid Syntax.")
+
+if __name__ == "__main__":
+    main()
@@ -31,6 +31,10 @@ _default_config = {
     "depth"         : 5,
     "ignorelegends" : True,
     "ignoreqi"      : True,
+    "workers"       : 0,
+    "probscache"    : 4096,
+    "simtrials"     : 1000000,
+    "simtimelimit"  : 0,
     "locations"     : [
     constants.LOCATION_BEACH,
     constants.LOCATION_FOREST,
@@ -64,3 +68,7 @@ BAIT_TARGET_ID            = _default_config["baitid"] # (sardine) the current ob
 WATER_DEPTH               = _default_config["depth"] # fishing zone (0, 1, 2, 3, 5)
 IGNORE_LEGENDARY_FISH     = _default_config["ignorelegends"]
 IGNORE_MR_QI              = _default_config["ignoreqi"]
+WORKERS                   = _default_config["workers"] # worker processes for heavier jobs. 0 uses every core
+PROBS_CACHE_SIZE          = _default_config["probscache"] # how many precedence group results to remember. 0 disables it
+SIMULATION_TRIALS         = _default_config["simtrials"] # how many catches to simulate per area for the simulate query
+SIMULATION_TIME_LIMIT     = _default_config["simtimelimit"] # seconds to spend simulating each area at most, before stopping early. 0 for no limit
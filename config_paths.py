@@ -14,14 +14,18 @@ Constants for Directory Paths. These should follow the convention of
 DIRECTORY_{dirname} with longer paths either providing _{subdir}_{subdir}... or just saying where it goes to
 """
 DIRECTORY_PROJECT = Path(os.path.dirname(__file__))
-DIRECTORY_DATA    = DIRECTORY_PROJECT + Path("data")
+# The data directory can be swapped out with the STARDEWFISH_DATA environment variable (e.g. for benchmark fixtures)
+DIRECTORY_DATA    = Path(os.environ["STARDEWFISH_DATA"]) if ("STARDEWFISH_DATA" in os.environ) else (DIRECTORY_PROJECT + Path("data"))
 
 # Private JSON needs to be setup here specifically as it has data which pertains to paths configuration
 _private_json:dict = read_file_json(DIRECTORY_DATA + Path("private_config.json"))
 USER               = _private_json["User"]
 
+# The game directory can be set explicitly with "StardewValleyDirectory", for installs outside the default Steam folder
+DEFAULT_GAME_DIRECTORY = "StardewValleyDirectory" not in _private_json
+
 DIRECTORY_USER                  = Path(f"C:/Users/{USER}")
-DIRECTORY_STARDEW_VALLEY        = Path("C:/Program Files (x86)/Steam/steamapps/common/Stardew Valley")
+DIRECTORY_STARDEW_VALLEY        = Path("C:/Program Files (x86)/Steam/steamapps/common/Stardew Valley") if (DEFAULT_GAME_DIRECTORY) else Path(_private_json["StardewValleyDirectory"])
 DIRECTORY_CONTENT_UNPACKED_DATA = DIRECTORY_STARDEW_VALLEY + Path("Content (unpacked)/Data")
 
 """
@@ -39,10 +43,7 @@ FILE_JSON_FISH      = DIRECTORY_CONTENT_UNPACKED_DATA + Path("Fish.json")
 FILE_JSON_LOCATIONS = DIRECTORY_CONTENT_UNPACKED_DATA + Path("Locations.json")
 FILE_JSON_FURNITURE = DIRECTORY_CONTENT_UNPACKED_DATA + Path("Furniture.json")
 
-FILE_PYOBJECTS_BASEOBJECT   = DIRECTORY_DATA + Path("object_data.dat")
-FILE_PYOBJECTS_FISH         = DIRECTORY_DATA + Path("fish_data.dat")
-FILE_PYOBJECTS_GAMELOCATION = DIRECTORY_DATA + Path("location_data.dat")
-FILE_PYOBJECTS_FURNITURE    = DIRECTORY_DATA + Path("furniture_data.dat")
+FILE_SNAPSHOT_GAMEDATA = DIRECTORY_DATA + Path("game_data.snapshot")
 
 # Assert all paths exist
 
@@ -53,7 +54,8 @@ def ensure(file_or_dir:str|Path):
 
 ensure(DIRECTORY_PROJECT)
 ensure(DIRECTORY_DATA)
-ensure(DIRECTORY_USER)
+if DEFAULT_GAME_DIRECTORY:
+    ensure(DIRECTORY_USER)
 ensure(DIRECTORY_STARDEW_VALLEY)
 ensure(DIRECTORY_CONTENT_UNPACKED_DATA)
 
@@ -61,8 +63,5 @@ ensure(FILE_JSON_OBJECTS)
 ensure(FILE_JSON_FISH)
 ensure(FILE_JSON_FURNITURE)
 
-# DO NOT UNCOMMENT. This is here so I can tell you not to do this -- these files are not required.
-# ensure(FILE_PYOBJECTS_BASEOBJECT)
-# ensure(FILE_PYOBJECTS_FISH)
-# ensure(FILE_PYOBJECTS_GAMELOCATION)
-# ensure(FILE_PYOBJECTS_FURNITURE)
+# DO NOT UNCOMMENT. This is here so I can tell you not to do this -- this file is not required.
+# ensure(FILE_SNAPSHOT_GAMEDATA)
@@ -7,7 +7,12 @@ import sys
 
 from stardewfish.location_query import get_location_stats
 from stardewfish.fish_query     import handle_fish_query
+from stardewfish.fish_batch_query import handle_fish_batch_query
 from stardewfish.config_query   import handle_config_query
+from stardewfish.simulation_query import handle_simulation_query
+from stardewfish.sweep_query    import handle_sweep_query
+from stardewfish.day_profile_query import handle_day_profile_query
+from stardewfish.best_query     import handle_best_query
 
 def fail_query(message="Invalid Syntax."):
     print(message)
@@ -17,7 +22,7 @@ def main():
     args = sys.argv
 
     query_type = args[1]
-    allowed_queries = ["locations", "fish", "context"]
+    allowed_queries = ["locations", "fish", "fishes", "context", "simulate", "sweep", "day", "best"]
     if query_type not in allowed_queries:
         fail_query()
     
@@ -33,9 +38,36 @@ def main():
         handle_fish_query(fish_name)
         quit()
 
+    elif query_type == "fishes":
+        # Many fish, split by commas, and/or read from a file or stdin
+        handle_fish_batch_query(args[2:])
+        quit()
+
     elif query_type == "context":
         handle_config_query(args[2:])
         quit()
 
+    elif query_type == "simulate":
+        # Same as locations, but checked against a simulation
+        locations = [name.lower().title() for name in args[2:]]
+        handle_simulation_query(locations)
+        quit()
+
+    elif query_type == "sweep":
+        # Axes (like time=all) and locations, in any order
+        handle_sweep_query(args[2:])
+        quit()
+
+    elif query_type == "day":
+        # Same as locations, but over the whole day
+        locations = [name.lower().title() for name in args[2:]]
+        handle_day_profile_query(locations)
+        quit()
+
+    elif query_type == "best":
+        # What to rank by, options (like top=5) and locations, in any order
+        handle_best_query(args[2:])
+        quit()
+
 if __name__ == "__main__":
     main()
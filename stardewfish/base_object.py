@@ -51,3 +51,9 @@ class BaseObject():
     self.exclude_from_random_sale:bool = json["ExcludeFromRandomSale"]
     # Optional custom fields used by modders. default None
     self.custom_fields:dict|None = json["CustomFields"]
+
+  @staticmethod
+  def get_json_fields() -> list[str]|None:
+    """The fields of an Objects.json entry this reads, or None if it reads all of them."""
+    if config.IGNORE_IRRELEVANT_JSON: return ["Name", "Price", "ContextTags"]
+    return None
@@ -0,0 +1,194 @@
+"""
+File which holds find_best, for searching locations, areas, times of day and tackle for what gets the most coins or XP
+per catch. Rather than trying everything, each (location, area, time window) gets an upper bound first, and any that
+can't beat what's been found already are skipped.
+Copyright (C) 2024 Romayne (Contact @ https://github.com/MyNameIsRomayne)
+"""
+
+import dataclasses
+import heapq
+
+import constants
+from stardewfish import game_object
+from stardewfish.game_object import GameLocation, FishLocation
+from stardewfish.scenario import Scenario
+from stardewfish.stage_cache import get_fish_key
+
+# What find_best can rank by, and which of get_fish_loc_stats' results each is
+METRICS = {"coins": 0, "xp": 1}
+# Depths tried when none are given (how far out the bobber is, in tiles from land)
+DEPTHS = [0, 1, 2, 3, 4, 5]
+LURES = [constants.FISHING_LURE_NONE, constants.FISHING_LURE_CURIOSITY]
+# How many tackle options of a branch are weighed together, before checking which of the rest can still do better
+OPTIONS_PER_BATCH = 8
+
+def get_option_fields(option:dict) -> dict:
+    """Get how a tackle option (Player attribute changes) is put in find_best's results."""
+    return {"depth": option["fishing_depth"], "bait": option["bait"], "bait_target_id": option["bait_target_id"], "lure": option["lure"]}
+
+def get_expected(composition:dict[str, list]) -> tuple[float, float]:
+    """Get the expected coins and XP of one catch from an area's composition."""
+    return (float(sum([chance * coins for chance, coins in zip(composition["chances"], composition["coins"])])),
+            float(sum([chance * xp for chance, xp in zip(composition["chances"], composition["xp"])])))
+
+def get_bound(values:list[float], caps:list[float], target_caps:list[float], targets:list[bool]) -> float:
+    """
+    Get the most one catch could be worth on average, out of fish worth values each. A fish is only ever caught if its
+    own chance passes, so it can't be caught more often than that chance (caps, or target_caps for the fish the
+    targeted bait is on, which targets marks), and all of them together can't be caught more than every time.
+    """
+    remaining, bound = 1.0, 0.0
+    # Give the most likely catch to the most valuable fish first
+    for i in sorted(range(len(values)), key=lambda i: -values[i]):
+        taken = min(remaining, target_caps[i] if targets[i] else caps[i])
+        bound += taken * values[i]
+        remaining -= taken
+        if remaining <= 0:
+            break
+    return bound
+
+def get_branches(locations:list[GameLocation], times:list[int], depths:list[int], base:Scenario, metric:str) -> list[list]:
+    """
+    Get every (location, area, time window) worth searching, along with every tackle option (depth, lure, and bait,
+    including targeted bait on each fish there) and an upper bound (see get_bound) on what each could get there.
+    Magic bait only ever adds fish to an area, so the fish with magic bait are every fish any bait could get.
+    Back to back windows where an area has the same fish are one branch, since everything about them is the same.
+    Returns [bound, location, area, start time, end time, [(bound, option) for each option]] for each, best bound first,
+    where each option is the Player attributes it changes and the branch's bound is the best of its options'.
+    """
+    game_data = game_object.get_locations_game(locations)
+    time_index = game_data.get_time_index()
+    windows = sorted(set([time_index.get_window_start(time) for time in times]), key=lambda window: (window == None, window))
+    stat_index = METRICS[metric]
+    branches:list[list] = []
+    # The last branch of each area, with the fish it had, for putting back to back windows together
+    last_branches:dict[tuple, tuple[tuple, list]] = {}
+    for window in windows:
+        window_scenario = dataclasses.replace(base, time=window if (window != None) else times[0],
+                                              player=dataclasses.replace(base.player, bait=constants.FISHING_BAIT_MAGIC))
+        inherited = game_data.get_inherited_fish(window_scenario)
+        # The branches that start in this window, with the fish in each
+        new_branches:list[tuple[list, list[FishLocation]]] = []
+        for location in locations:
+            for area in [None] + location.areas:
+                own_fish = location.get_catchable_fish(area, window_scenario)
+                if not len(own_fish):
+                    continue
+                fish_locs = own_fish + (inherited if (location.id != "Default") else [])
+                fish_key = get_fish_key(fish_locs)
+                last_fish_key, last_branch = last_branches.get((location.id, area), (None, None))
+                if (last_fish_key == fish_key) and (last_branch[4] == window):
+                    last_branch[4] = time_index.get_window_end(window)
+                    continue
+                branch = [0, location, area, window if (window != None) else times[0], time_index.get_window_end(window), []]
+                last_branches[(location.id, area)] = (fish_key, branch)
+                new_branches.append((branch, fish_locs))
+
+        # The value and chances of every fish in this window at each depth and lure, all worked out together
+        window_fish = list({id(fish): fish for _, fish_locs in new_branches for fish in fish_locs}.values())
+        fish_rows = {id(fish): i for i, fish in enumerate(window_fish)}
+        values:dict[int, list[float]] = {}
+        caps:dict[tuple[int, str], tuple[list[float], list[float]]] = {}
+        for depth in depths:
+            depth_player = dataclasses.replace(window_scenario.player, fishing_depth=depth)
+            depth_scenario = dataclasses.replace(window_scenario, player=depth_player)
+            fish_stats = game_data.get_fish_stats(depth_scenario)
+            values[depth] = [game_object.get_fish_loc_stats(fish, fish_stats, depth_scenario, game_data)[stat_index] for fish in window_fish]
+            for lure in LURES:
+                lure_scenario = dataclasses.replace(depth_scenario, player=dataclasses.replace(depth_player, lure=lure))
+                caps[(depth, lure)] = tuple([[min(1, max(0, fish.chance * chance)) for fish, chance in
+                                              zip(window_fish, game_object.get_fish_chances(window_fish, lure_scenario, target_all, game_data))]
+                                             for target_all in [False, True]])
+
+        for branch, fish_locs in new_branches:
+            rows = [fish_rows[id(fish)] for fish in fish_locs]
+            fish_ids = list(dict.fromkeys([fish.itemids[0].id for fish in fish_locs if fish.itemids[0].id in game_data.fish_objects]))
+            # Simpler options come first, so they win out over fancier ones which don't do any better
+            baits = [(constants.FISHING_BAIT_NONE, None), (constants.FISHING_BAIT_MAGIC, None)]
+            baits += [(constants.FISHING_BAIT_TARGETED, fish_id) for fish_id in fish_ids]
+            for depth in depths:
+                depth_values = [values[depth][i] for i in rows]
+                for lure in LURES:
+                    fish_caps, fish_target_caps = caps[(depth, lure)]
+                    fish_caps, fish_target_caps = [fish_caps[i] for i in rows], [fish_target_caps[i] for i in rows]
+                    untargeted_bound = get_bound(depth_values, fish_caps, fish_target_caps, [False]*len(rows))
+                    for bait, target in baits:
+                        bound = untargeted_bound
+                        if target != None:
+                            bound = get_bound(depth_values, fish_caps, fish_target_caps, [fish.itemids[0].id == target for fish in fish_locs])
+                        branch[5].append((bound, {"fishing_depth": depth, "lure": lure, "bait": bait, "bait_target_id": target}))
+            branch[0] = max([bound for bound, _ in branch[5]])
+            branches.append(branch)
+    branches.sort(key=lambda branch: -branch[0])
+    return branches
+
+def find_best(locations:list[GameLocation], metric:str = "coins", count:int = 10, times:list[int] = None,
+              depths:list[int] = None, base:Scenario = None) -> list[dict]:
+    """
+    Find the count best places and ways to fish by expected coins or XP (metric) per catch, out of every area of
+    locations, every time in times, every depth in depths, and every bait and lure. Season, weather, fishing level,
+    rod and anything else come from base (default the scenario of the GameObject the locations were loaded by).
+    times: defaults to the whole day. Times with the same fish (see TimeIndex) are only tried once, as their window.
+    depths: defaults to DEPTHS
+    Returns a dict for each, best first, of its location, area, time window (start and end), depth, bait, bait target,
+    lure, and expected coins and xp.
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric {metric}")
+    game_data = game_object.get_locations_game(locations)
+    base = game_object.get_scenario(base, game_data)
+    times = game_data.get_time_index().change_points if (times == None) else times
+    depths = DEPTHS if (depths == None) else depths
+    stat_index = METRICS[metric]
+    # Min-heap of the best found so far, as (score, order found, result) so the worst is always on top
+    best:list[tuple[float, int, dict]] = []
+    found = 0
+
+    for bound, location, area, start_time, end_time, options in get_branches(locations, times, depths, base, metric):
+        # Nothing in here can beat the worst of the best, and everything after has an even lower bound
+        if (len(best) >= count) and (bound <= best[0][0]):
+            break
+        # Same goes for each option. They're tried best bound first, a batch at a time so each batch is weighed together
+        options = sorted(enumerate(options), key=lambda entry: -entry[1][0])
+        # Tackle which does exactly the same as something simpler (earlier in the options) isn't worth listing separately,
+        # so each result found here is kept by what it got, along with how simple its tackle was
+        branch_results:dict[tuple[float, float], tuple[int, dict]] = {}
+        for batch_start in range(0, len(options), OPTIONS_PER_BATCH):
+            batch = [(order, option) for order, (option_bound, option) in options[batch_start:batch_start + OPTIONS_PER_BATCH]
+                     if (len(best) < count) or (option_bound > best[0][0])]
+            if not len(batch):
+                break
+            scenarios = [dataclasses.replace(base, time=start_time, player=dataclasses.replace(base.player, **option)) for _, option in batch]
+            area_keys = game_object.weigh_areas([(location, area, scenario) for scenario in scenarios])
+            for (order, option), scenario, area_key in zip(batch, scenarios, area_keys):
+                if area_key == None:
+                    continue
+                expected = get_expected(location.get_area_composition_from_key(area, area_key, scenario))
+                if expected in branch_results:
+                    simplest_order, result = branch_results[expected]
+                    if order < simplest_order:
+                        result.update(get_option_fields(option))
+                        branch_results[expected] = (order, result)
+                    continue
+                score = expected[stat_index]
+                if (len(best) >= count) and (score <= best[0][0]):
+                    continue
+                result = {
+                    "location" : location.id,
+                    "area"     : area,
+                    "time"     : start_time,
+                    "time_end" : end_time,
+                    **get_option_fields(option),
+                    "coins"    : expected[0],
+                    "xp"       : expected[1],
+                }
+                branch_results[expected] = (order, result)
+                found += 1
+                # Ties go to whatever was found first
+                entry = (score, -found, result)
+                if len(best) < count:
+                    heapq.heappush(best, entry)
+                else:
+                    heapq.heapreplace(best, entry)
+
+    return [result for _, _, result in sorted(best, key=lambda entry: (-entry[0], -entry[1]))]
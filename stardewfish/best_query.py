@@ -0,0 +1,55 @@
+"""
+File which holds handle_best_query, for printing the best places, times and tackle to fish with.
+Copyright (C) 2024 Romayne (Contact @ https://github.com/MyNameIsRomayne)
+"""
+
+import stardewfish.utils as utils
+import constants
+import config
+
+from stardewfish import game_object
+from stardewfish.best import find_best, METRICS
+game = game_object.game
+
+def handle_best_query(args:list[str]):
+    """
+    Print the best ways to fish in the locations in args (or config.LOCATIONS, if there aren't any).
+    args can also have coins or xp for what to rank by (default coins), top=K for how many to show (default 10),
+    time=now to only look at the configured time (or time=1300 for another one), and depth=3,4,5 for which depths to try.
+    """
+    metric = "coins"
+    count = 10
+    times = None
+    depths = None
+    locations:list[str] = []
+    for arg in args:
+        if arg.lower() in METRICS:
+            metric = arg.lower()
+            continue
+        if "=" not in arg:
+            locations.append(str(arg).lower().title())
+            continue
+        key, value = arg.split("=", 1)
+        if key == "top":
+            count = int(value)
+        elif key == "time":
+            times = None if (value == "all") else [config.TIME] if (value == "now") else [int(time) for time in value.split(",")]
+        elif key == "depth":
+            depths = [int(depth) for depth in value.split(",")]
+        else:
+            print(f"Option {key} not recognized. Valid options: top, time, depth")
+            return
+
+    use_locations = config.LOCATIONS if (len(locations) == 0) else locations
+    results = find_best([game.location_objects[str(name).lower().title()] for name in use_locations], metric, count, times, depths)
+    print(f"Best {len(results)} by expected {metric} per catch, in {game.scenario.season} ({game.scenario.weather}).\n")
+
+    printable_data:list[list[str]] = [["Area", "Time", "Depth", "Bait", "Lure", "Avg Coin", "Avg XP"]]
+    for result in results:
+        area_blurb = f" ({result['area']})" if (result["area"] != None) else ""
+        bait = result["bait"]
+        if bait == constants.FISHING_BAIT_TARGETED:
+            bait = f"targeted ({game.base_objects[result['bait_target_id']].name})"
+        printable_data.append([f"{result['location']}{area_blurb}", f"{result['time']} - {result['time_end']}", str(result["depth"]),
+                               bait, result["lure"], str(round(result["coins"], 2)), str(round(result["xp"], 2))])
+    print(utils.format2DListAsTable(printable_data, char_limit=32, column_delimiter="   "))
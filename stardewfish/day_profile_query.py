@@ -0,0 +1,60 @@
+"""
+File which holds handle_day_profile_query, for printing how the catches of locations change over the day.
+Copyright (C) 2024 Romayne (Contact @ https://github.com/MyNameIsRomayne)
+"""
+
+import stardewfish.utils as utils
+import config
+
+from stardewfish import game_object
+from stardewfish.sweep import get_day_profile
+from stardewfish.time_index import DAY_END
+game = game_object.game
+
+def get_averages(area_data:dict[str, list]) -> tuple[float, float]:
+    """Get the average coins and XP of one catch in an area, from its composition."""
+    avg_coin = sum([ratio * coins for ratio, coins in zip(area_data["chances"], area_data["coins"])])
+    avg_xp = sum([ratio * xp for ratio, xp in zip(area_data["chances"], area_data["xp"])])
+    return round(avg_coin, 2), round(avg_xp, 2)
+
+def handle_day_profile_query(locations=[]):
+    """
+    Print the catches of each location's areas (or config.LOCATIONS, if there aren't any) through the day, one row per
+    stretch of time where they stay the same.
+    """
+    use_locations = config.LOCATIONS if (len(locations) == 0) else locations
+    profile = get_day_profile([game.location_objects[str(name).lower().title()] for name in use_locations])
+    change_points:list[int] = profile["change_points"]
+    print(f"Day profile with {len(change_points)} change points: {', '.join([str(point) for point in change_points])}\n")
+
+    printable_data:list[list[str]] = []
+    row_len = 4
+    column_char_limit = 20
+
+    for iter, location_name in enumerate(use_locations):
+        # Every area that shows up at any point in the day, in the order they first do
+        areas:list[str] = []
+        for point in change_points:
+            areas += [area for area in profile["compositions"][point][iter].keys() if area not in areas]
+        for area in areas:
+            subloc_blurb = f" ({area})" if (area != "none") else ""
+            printable_data.append([""]*row_len)
+            printable_data.append([f"{location_name}{subloc_blurb}", "Catchables", "Avg Coin", "Avg XP"])
+            printable_data.append(["-"*column_char_limit]*row_len)
+            # Stretches of the day where the area stays the same are put together
+            stretches:list[tuple[int, int, dict]] = []
+            for i, point in enumerate(change_points):
+                end = change_points[i + 1] if (i + 1 < len(change_points)) else DAY_END
+                area_data = profile["compositions"][point][iter].get(area, {})
+                if len(stretches) and (stretches[-1][2] == area_data):
+                    stretches[-1] = (stretches[-1][0], end, area_data)
+                else:
+                    stretches.append((point, end, area_data))
+            for start, end, area_data in stretches:
+                if area_data == {}:
+                    printable_data.append([f"{start} - {end}", "0", "-", "-"])
+                    continue
+                avg_coin, avg_xp = get_averages(area_data)
+                printable_data.append([f"{start} - {end}", f"{len(area_data['fish'])}", f"{avg_coin}", f"{avg_xp}"])
+
+    print(utils.format2DListAsTable(printable_data, char_limit=column_char_limit, column_delimiter="   "))
@@ -0,0 +1,80 @@
+"""
+File which holds handle_fish_batch_query, for printing the stats of many fish at once.
+Copyright (C) 2024 Romayne (Contact @ https://github.com/MyNameIsRomayne)
+"""
+
+import sys
+
+import config
+
+from stardewfish.game_object import game
+from stardewfish.base_object import BaseObject
+from stardewfish.fish_query  import get_game_context, get_fish_report, get_many_fish_area_chances
+
+def find_fish(value:str) -> tuple[BaseObject|None, str|None]:
+    """
+    Get the fish a name or item ID refers to, without asking like the fish query does when there's more than one match.
+    A name gets the fish with exactly that name, or else the only fish with it in their name.
+    Returns (fish, None) if it was found, or (None, why it wasn't) if not.
+    """
+    if value.isnumeric():
+        if value not in game.base_objects:
+            return None, f"Item ID {value} not found."
+        target = game.base_objects[value]
+        if value not in game.fish_objects:
+            return None, f"{target.name} ({value}) is not a fish."
+        return target, None
+    value = value.lower()
+    fish_list = [game.base_objects[key] for key in game.fish_objects if key in game.base_objects]
+    matches = [fish for fish in fish_list if fish.name.lower() == value]
+    if not len(matches):
+        matches = [fish for fish in fish_list if value in fish.name.lower()]
+    if not len(matches):
+        return None, f"Name {value} not found."
+    if len(matches) > 1:
+        return None, f"Multiple matches of {value} found ({', '.join([fish.name for fish in matches])}), skipping."
+    return matches[0], None
+
+def handle_fish_batch_query(args:list[str]):
+    """
+    Print the stats of every fish in args, which are names or item IDs split by commas (so names can have spaces).
+    file=path reads more of them from a file, one per line, and - reads them from stdin (which is also used if there
+    aren't any). all gets every fish. Each fish is printed as soon as it's done.
+    """
+    values:list[str] = []
+    use_stdin = False
+    for arg in args:
+        if arg.startswith("file="):
+            with open(arg.split("=", 1)[1], "r") as file:
+                values += [line.strip() for line in file]
+        elif arg == "-":
+            use_stdin = True
+    names = " ".join([arg for arg in args if (not arg.startswith("file=")) and (arg != "-")])
+    values += [value.strip() for value in names.split(",")]
+    if use_stdin or (len(args) == 0):
+        values += [line.strip() for line in sys.stdin]
+
+    # Work out which fish each value is first, so all of their areas can be weighed together
+    targets:dict[str, BaseObject] = {}
+    for value in [value for value in values if value != ""]:
+        if value.lower() == "all":
+            targets.update({key: game.base_objects[key] for key in game.fish_objects
+                            if (key in game.base_objects) and not game.fish_objects[key].is_trap()})
+            continue
+        target, error = find_fish(value)
+        if target == None:
+            print(error)
+        elif game.fish_objects[target.id].is_trap():
+            print(f"{target.name} ({target.id}) is caught in crab pots, which isn't supported yet.")
+        else:
+            targets[target.id] = target
+    if not len(targets):
+        print("No fish to report.")
+        return
+
+    print("Game and Player context:")
+    print(get_game_context(), end="\n\n")
+    locations = [game.location_objects[name] for name in config.LOCATIONS]
+    for target_id, area_chances in get_many_fish_area_chances(list(targets.keys()), locations):
+        print("Fish context:")
+        print(get_fish_report(targets[target_id], game.fish_objects[target_id], area_chances), end="\n\n", flush=True)
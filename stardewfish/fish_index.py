@@ -0,0 +1,45 @@
+"""
+File which holds the FishIndex class, every fish spawn of every location looked up by the item it gives, so finding
+where an item can be caught doesn't mean going through every location.
+Copyright (C) 2024 Romayne (Contact @ https://github.com/MyNameIsRomayne)
+"""
+
+from collections.abc import Mapping
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from stardewfish.game_object import FishLocation
+
+class FishIndex():
+    """
+    The (location ID, area ID, FishLocation) of every fish spawn, keyed by the ID of each item it can give. Spawns which
+    other locations inherit from Default can show up in any area of any location, so their items are kept in inherited.
+    """
+
+    def __init__(self, location_objects:Mapping):
+        self.spawns:dict[str, list[tuple[str, str|None, "FishLocation"]]] = {}
+        # The (location ID, area ID) of every spawn of each item, for checking whether an area has any quickly
+        self.areas:dict[str, set[tuple[str, str|None]]] = {}
+        for location_id in location_objects:
+            location = location_objects[location_id]
+            for fish_loc in location.fish:
+                for item in fish_loc.itemids:
+                    # Random fish (still a string) and unsupported item types (None) don't give any one item
+                    if (item == None) or isinstance(item, str):
+                        continue
+                    self.spawns.setdefault(item.id, []).append((location_id, fish_loc.fishareaid, fish_loc))
+                    self.areas.setdefault(item.id, set()).add((location_id, fish_loc.fishareaid))
+        self.inherited:set[str] = set()
+        if "Default" in location_objects:
+            for fish_loc in location_objects["Default"].get_inheritable_fish():
+                self.inherited.update([item.id for item in fish_loc.itemids if (item != None) and not isinstance(item, str)])
+
+    def get_spawns(self, item_id:str) -> list[tuple[str, str|None, "FishLocation"]]:
+        """Get the (location ID, area ID, FishLocation) of every spawn which can give an item."""
+        return self.spawns.get(item_id, [])
+
+    def can_spawn_in(self, item_id:str, location_id:str, area:str|None) -> bool:
+        """Whether an item could ever be caught in an area of a location, either from its own spawns or inherited ones."""
+        if (item_id in self.inherited) and (location_id != "Default"):
+            return True
+        return (location_id, area) in self.areas.get(item_id, ())
@@ -3,16 +3,123 @@ File which handles querying information about some given fish/ID
 Copyright (C) 2024 Romayne (Contact @ https://github.com/MyNameIsRomayne)
 """
 
+from collections.abc import Iterator
+
+from stardewfish import game_object
 from stardewfish.game_object import game
 from stardewfish.base_object import BaseObject
-from stardewfish.game_object import CatchableData, FishLocation, scale_price_by_quality
+from stardewfish.game_object import CatchableData, FishLocation, GameLocation, scale_price_by_quality
+from stardewfish.scenario    import Scenario
 from stardewfish.utils       import format2DListAsTable, military_to_classic
 
 import config
 import constants
 
+def get_fish_area_chances(target_id:str, locations:list[GameLocation], scenario:Scenario = None) -> list[tuple[str, str|None, float|None]]:
+    """
+    Get the chance of a catch being target_id in each area of locations, as (location ID, area ID, chance) with None for
+    the chance if it can't be caught there. Areas are listed like the locations query does: no particular area always,
+    other areas only if something's catchable there.
+    scenario: the scenario to get them for. Defaults to the scenario of the GameObject the locations were loaded by
+    """
+    return next(get_many_fish_area_chances([target_id], locations, scenario))[1]
+
+def get_many_fish_area_chances(target_ids:list[str], locations:list[GameLocation], scenario:Scenario = None) -> Iterator[tuple[str, list[tuple[str, str|None, float|None]]]]:
+    """
+    Same as get_fish_area_chances for many fish, giving (target ID, area chances) for each fish as it's done.
+    Only the areas some fish can spawn in (see FishIndex) get their compositions worked out, since the rest can't have
+    any of them. Those are all weighed in one batch up front, and each one's composition is only looked through once.
+    """
+    game_data = game_object.get_locations_game(locations)
+    scenario = game_object.get_scenario(scenario, game_data)
+    fish_index = game_data.get_fish_index()
+    areas = [(location, area) for location in locations for area in [None] + location.areas]
+    spawn_areas = [set([(location, area) for location, area in areas if fish_index.can_spawn_in(target_id, location.id, area)])
+                   for target_id in target_ids]
+    all_spawn_areas = set().union(*spawn_areas)
+    needed_areas = [(location, area) for location, area in areas if (location, area) in all_spawn_areas]
+    area_keys = dict(zip(needed_areas, game_object.weigh_areas([(location, area, scenario) for location, area in needed_areas])))
+    for location, area in areas:
+        if (location, area) not in area_keys:
+            area_keys[(location, area)] = location.get_area_key(area, scenario)
+    # The chance of each item in an area, for each area that's been looked through so far
+    item_chances:dict[tuple[GameLocation, str|None], dict[str, float]] = {}
+
+    for target_id, spawns in zip(target_ids, spawn_areas):
+        area_chances:list[tuple[str, str|None, float|None]] = []
+        for location, area in areas:
+            area_key = area_keys[(location, area)]
+            if (area != None) and (area_key == None):
+                continue
+            chance = None
+            if ((location, area) in spawns) and (area_key != None):
+                if (location, area) not in item_chances:
+                    composition = location.get_area_composition_from_key(area, area_key, scenario)
+                    chances:dict[str, float] = {}
+                    for fish, fish_chance in zip(composition["fish"], composition["chances"]):
+                        fish:FishLocation
+                        # A spawn which picks one of a few items gives each of them equally often, and the same item
+                        # can have more than one spawn in an area
+                        for item in fish.itemids:
+                            chances[item.id] = chances.get(item.id, 0) + fish_chance / len(fish.itemids)
+                    item_chances[(location, area)] = chances
+                chance = item_chances[(location, area)].get(target_id)
+            area_chances.append((location.id, area, chance))
+        yield target_id, area_chances
+
+def get_game_context() -> str:
+    """Get the game and player context every fish is reported in, as a table."""
+    BAIT_TARGET_NAME = (game.base_objects[config.BAIT_TARGET_ID].name) if (config.BAIT_USED == constants.FISHING_BAIT_TARGETED) else ("none")
+    initial_data = [
+        [f"Season: {game.scenario.season}", f"Weather: {game.scenario.weather}", f"Time: {military_to_classic(config.TIME)}"],
+        [f"Depth: {config.WATER_DEPTH}", f"Bait: {config.BAIT_USED}", f"Bait Target: {BAIT_TARGET_NAME}"],
+        [f"Fishing Level: {config.FISHING_LEVEL}", f"Perfect catches: {config.SCALE_PCT_PERFECT_CATCHES*100}%", f"Rod used: {config.ROD_USED}"]
+    ]
+    return format2DListAsTable(initial_data, column_delimiter="   ")
+
+def get_fish_report(target:BaseObject, catchable:CatchableData, area_chances:list[tuple[str, str|None, float|None]]) -> str:
+    """Get the stats of a fish and how often it's caught in each area (see get_fish_area_chances), as a table."""
+    # Min/max size relative to player data
+    min_size_rel, max_size_rel = catchable.get_fish_size_ranges()
+    min_size_rel, max_size_rel = round(min_size_rel*float(catchable.min_size), 2), round(max_size_rel*float(catchable.max_size), 2)
+
+    quality_proportions_unformatted = catchable.get_quality_proportions()
+    formatpct = lambda k: f"{round(quality_proportions_unformatted[k]*100, 2)}%"
+
+    scaled_values = [scale_price_by_quality(target.price, quality) for quality in quality_proportions_unformatted.keys()]
+    scaled_pct_perfect = f"{round(100*catchable.get_pct_perfect(), 2)}%"
+
+    # Formatted data for read-out
+    formatted_location_data = [
+
+    ]
+
+    # Get each location+sublocation pair the fish is in
+    for location_id, sublocation, chance in area_chances:
+        subloc_blurb = f" ({sublocation})" if sublocation != None else ''
+        location_data_fish = [
+            f"{location_id}{subloc_blurb}", # location (sublocation)
+            "No" if (chance == None) else "Yes", # has_fish
+            '', # seasons_appears
+            '', # weather_appears
+            '' if (chance == None) else f"{round(100 * chance, 2)}%" # weight_appears
+        ]
+        formatted_location_data.append(location_data_fish)
+
+    data = [
+        [f"Name: {target.name}",  f"Object ID: {target.id}", f"Avg. XP: {catchable.get_average_xp()}", f"Avg. Coins: {catchable.get_average_value()}", f"Scaled % Perfect: {scaled_pct_perfect}\n"],
+        ["Absolute min. size",    "Absolute max. size",      "Practical min. size",                    "Practical max. size",                          ""],
+        [f"{catchable.min_size}", f"{catchable.max_size}",   f"{min_size_rel}",                        f"{max_size_rel}",                              "\n"],
+        [ "",                     "Normal",                  "Silver",                                 "Gold",                                         "Iridium"],
+        [ "Quality:",             f"{formatpct(0)}",         f"{formatpct(1)}",                        f"{formatpct(2)}",                              f"{formatpct(4)}"],
+        [ "Value:",               f"{scaled_values[0]}",     f"{scaled_values[1]}",                    f"{scaled_values[2]}",                          f"{scaled_values[3]}\n"],
+        [ "Location Name",         "Appears In Location?",   f"Seasons it appears",                    f"Weather it appears in",                       f"Approx. % of catches"],
+
+    ]
+    data += formatted_location_data
+    return format2DListAsTable(data, column_delimiter="   ")
+
 def handle_fish_query(value:str):
-    game.post_init()
 
     target:BaseObject = None
     # If its all numbers, its an object ID -- so try and look it up
@@ -54,73 +161,6 @@ def handle_fish_query(value:str):
 
     # Print out preliminary info now that we have the target
     print("Game and Player context:")
-    BAIT_TARGET_NAME = (game.base_objects[config.BAIT_TARGET_ID].name) if (config.BAIT_USED == constants.FISHING_BAIT_TARGETED) else ("none")
-    # Print out initial data
-    initial_data = [
-        [f"Season: {game.season}", f"Weather: {game.weather}", f"Time: {military_to_classic(config.TIME)}"],
-        [f"Depth: {config.WATER_DEPTH}", f"Bait: {config.BAIT_USED}", f"Bait Target: {BAIT_TARGET_NAME}"],
-        [f"Fishing Level: {config.FISHING_LEVEL}", f"Perfect catches: {config.SCALE_PCT_PERFECT_CATCHES*100}%", f"Rod used: {config.ROD_USED}"]
-    ]
-    print(format2DListAsTable(initial_data, column_delimiter="   "), end="\n\n")
-
-    # Min/max size relative to player data
-    min_size_rel, max_size_rel = catchable.get_fish_size_ranges()
-    min_size_rel, max_size_rel = round(min_size_rel*float(catchable.min_size), 2), round(max_size_rel*float(catchable.max_size), 2)
-
-    quality_proportions_unformatted = catchable.get_quality_proportions()
-    formatpct = lambda k: f"{round(quality_proportions_unformatted[k]*100, 2)}%"
-
-    scaled_values = [scale_price_by_quality(target.price, quality) for quality in quality_proportions_unformatted.keys()]
-    scaled_xp     = []
-    scaled_pct_perfect = f"{round(100*catchable.get_pct_perfect(), 2)}%"
-
-    # Formatted data for read-out
-    formatted_location_data = [
-
-    ]
-
-    # Get each location+sublocation pair the fish is in
-    for possible_location in config.LOCATIONS:
-        location_data = game.location_objects[possible_location].get_composition()
-        for sublocation in location_data.keys():
-            # Assume fish not found
-            subloc_blurb = f" ({sublocation})" if sublocation != "none" else ''
-            location_data_fish = [
-                f"{possible_location}{subloc_blurb}", # location (sublocation)
-                "No", # has_fish
-                '', # seasons_appears
-                '', # weather_appears
-                '' # weight_appears
-            ]
-            subloc_val = location_data[sublocation]
-            for iter, fish in enumerate(subloc_val["fish"]):
-                fish:FishLocation
-                fish_name = fish.itemids[0].name
-
-                if fish_name.lower() != target.name.lower():
-                    continue
-                else:
-                    # Found fish, fill in location data and move on. Preformat it though ;P
-                    location_data_fish = [
-                        f"{possible_location}{subloc_blurb}", # location (sublocation)
-                        "Yes", # has_fish
-                        '', # seasons_appears
-                        '', # weather_appears
-                        f"{round( 100 * location_data[sublocation]["chances"][iter], 2)}%" # weight_appears
-                    ]
-                    break
-            formatted_location_data.append(location_data_fish)
-
-    data = [
-        [f"Name: {target.name}",  f"Object ID: {target.id}", f"Avg. XP: {catchable.get_average_xp()}", f"Avg. Coins: {catchable.get_average_value()}", f"Scaled % Perfect: {scaled_pct_perfect}\n"],
-        ["Absolute min. size",    "Absolute max. size",      "Practical min. size",                    "Practical max. size",                          ""],
-        [f"{catchable.min_size}", f"{catchable.max_size}",   f"{min_size_rel}",                        f"{max_size_rel}",                              "\n"],
-        [ "",                     "Normal",                  "Silver",                                 "Gold",                                         "Iridium"],
-        [ "Quality:",             f"{formatpct(0)}",         f"{formatpct(1)}",                        f"{formatpct(2)}",                              f"{formatpct(4)}"],
-        [ "Value:",               f"{scaled_values[0]}",     f"{scaled_values[1]}",                    f"{scaled_values[2]}",                          f"{scaled_values[3]}\n"],
-        [ "Location Name",         "Appears In Location?",   f"Seasons it appears",                    f"Weather it appears in",                       f"Approx. % of catches"],
-
-    ]
-    data += formatted_location_data
+    print(get_game_context(), end="\n\n")
     print("Fish context:")
-    print(format2DListAsTable(data, column_delimiter="   "))
+    print(get_fish_report(target, catchable, get_fish_area_chances(target.id, [game.location_objects[name] for name in config.LOCATIONS])))
@@ -0,0 +1,146 @@
+"""
+File which holds the FishTable class, every (non-trap) fish in Data/Fish packed into numpy columns.
+It does the same math as the CatchableData methods (get_average_chance, get_quality_proportions, get_average_value,
+get_average_xp) but for every fish at once, so areas don't need a method call per fish for each of them.
+Copyright (C) 2024 Romayne (Contact @ https://github.com/MyNameIsRomayne)
+"""
+
+from collections.abc import Mapping
+from math import floor
+import numpy as np
+
+import constants
+from stardewfish.player_object import Player
+
+# Quality levels in the order every (n, 4) quality array is laid out in
+QUALITIES = [constants.QUALITY_NORMAL, constants.QUALITY_SILVER, constants.QUALITY_GOLD, constants.QUALITY_IRIDIUM]
+PRICE_SCALES = [constants.PRICE_SCALE_NORMAL, constants.PRICE_SCALE_SILVER, constants.PRICE_SCALE_GOLD, constants.PRICE_SCALE_IRIDIUM]
+
+def compensated_sum(terms:list[np.ndarray]) -> np.ndarray:
+    """
+    Elementwise sum of terms, in the same (compensated) way python's sum() adds floats as of 3.12.
+    Plain adding can land a hair off from what the CatchableData methods get, which is enough to floor differently.
+    """
+    total = np.zeros_like(terms[0], dtype=np.float64)
+    compensation = np.zeros_like(total)
+    for term in terms:
+        new_total = total + term
+        compensation += np.where(np.abs(total) >= np.abs(term), (total - new_total) + term, (term - new_total) + total)
+        total = new_total
+    return np.where((compensation != 0) & np.isfinite(compensation), total + compensation, total)
+
+class FishTable():
+    """
+    Every fish that isn't a crab pot catch, as one row each across a set of column arrays.
+    Rows are looked up by fish ID through index. Traps aren't in here, since their chance/value/xp work differently.
+    """
+
+    def __init__(self, fish_objects:Mapping, base_objects:Mapping):
+        fish_list = [fish_objects[key] for key in fish_objects]
+        fish_list = [fish for fish in fish_list if not fish.is_trap()]
+        self.ids:list[str] = [fish.id for fish in fish_list]
+        self.index:dict[str, int] = {fish_id: row for row, fish_id in enumerate(self.ids)}
+        self.spawn_mult = np.array([fish.spawn_mult for fish in fish_list], dtype=np.float64)
+        self.depth_mult = np.array([fish.depth_mult for fish in fish_list], dtype=np.float64)
+        self.max_depth  = np.array([fish.max_depth  for fish in fish_list], dtype=np.float64)
+        self.difficulty = np.array([fish.difficulty for fish in fish_list], dtype=np.float64)
+        self.price      = np.array([base_objects[fish.id].price for fish in fish_list], dtype=np.float64)
+        self.legendary  = np.array([fish.is_legendary() for fish in fish_list], dtype=bool)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def get_chances(self, rows:np.ndarray, player:Player, daily_luck:float,
+                    curiosity_lure_buffs:np.ndarray, apply_daily_luck:np.ndarray, target_all:bool = False) -> np.ndarray:
+        """
+        Get the chance of each fish in rows, same as CatchableData.get_average_chance does, except for chance modifiers
+        (which are rare, and left for the caller to apply to the rows that have them).
+        curiosity_lure_buffs, apply_daily_luck: the CuriosityLureBuff/ApplyDailyLuck of the spawn data each row is for.
+        target_all: get each chance as if that fish was the targeted bait target, whatever the player's bait is.
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        spawn_mult = self.spawn_mult[rows]
+        chance = spawn_mult.copy()
+        drop_off = spawn_mult * self.depth_mult[rows]
+        chance -= np.maximum(0, self.max_depth[rows] - player.fishing_depth) * drop_off
+        chance += player.fishing_level / 50
+        if player.fishing_rod == constants.FISHING_ROD_TRAINING:
+            chance = chance * 1.1
+        chance = np.minimum(0.9, chance)
+        if player.lure == constants.FISHING_LURE_CURIOSITY:
+            max_val = 0.25
+            min_val = 0.08
+            low = chance < 0.25
+            buffed = chance + curiosity_lure_buffs
+            rescaled = (max_val - min_val) / max_val * chance + (max_val - min_val) / 2
+            chance = np.where(low & (curiosity_lure_buffs > -1), buffed, np.where(low, rescaled, chance))
+        if target_all:
+            chance = chance * (4/3)
+        elif player.bait == constants.FISHING_BAIT_TARGETED:
+            targeted = np.array([self.ids[row] == player.bait_target_id for row in rows], dtype=bool)
+            chance = np.where(targeted, chance * (4/3), chance)
+        return np.where(apply_daily_luck, chance + daily_luck, chance)
+
+    def get_pct_perfect(self, player:Player) -> np.ndarray:
+        """Get the percent of perfect catches for every fish. See CatchableData.get_pct_perfect"""
+        if not player.scale_perfect_by_difficulty:
+            return np.full(len(self), float(player.pct_perfect))
+        scaled_pct_level      = 0.5 + (0.05 * player.fishing_level)
+        scaled_pct_difficulty = (1.5 - self.difficulty/100)
+        return np.clip(player.pct_perfect*scaled_pct_difficulty*scaled_pct_level, 0, 1)
+
+    def get_quality_proportions(self, player:Player) -> np.ndarray:
+        """
+        Get the proportion of each quality for every fish, as an (n, 4) array in the order of QUALITIES.
+        See CatchableData.get_quality_proportions
+        """
+        # Size ranges only depend on the player, so the proportions before perfect catches are the same for every fish
+        min_level_contribution = 1 + floor(player.fishing_level / 2)
+        max_level_contribution = max(6, min_level_contribution) / 5
+        min_level_contribution /= 5
+        base_fish_size = player.fishing_depth/5
+        min_size = min_level_contribution * base_fish_size * 0.9
+        max_size = max_level_contribution * base_fish_size * 1.1
+        base = [0.0, 0.0, 0.0, 0.0]
+        bounds = [[-9999, 0.33], [0.33, 0.66], [0.66, 9999]]
+        min_quality = sum(min_size >= bound for bound in [0.33, 0.66])
+        max_quality = sum(max_size >= bound for bound in [0.33, 0.66])
+        if min_quality == max_quality:
+            base[min_quality] = 1.0
+        else:
+            size_range = max_size - min_size
+            for column, (bounds_min, bounds_max) in enumerate(bounds):
+                base[column] = max(0, (min(max_size, bounds_max) - max(min_size, bounds_min)) / size_range)
+
+        qualities = np.tile(np.array(base, dtype=np.float64), (len(self), 1))
+        scaled_pct_perfect = self.get_pct_perfect(player)
+        # Perfect catches bump silver to gold and gold to iridium
+        split_from_gold = qualities[:, 2] * scaled_pct_perfect
+        split_from_silver = qualities[:, 1] * scaled_pct_perfect
+        qualities[:, 2] -= split_from_gold
+        qualities[:, 1] -= split_from_silver
+        qualities[:, 2] += split_from_silver
+        qualities[:, 3] += split_from_gold
+        return qualities
+
+    def get_average_values(self, player:Player, skill_bonus = constants.SKILL_NONE, qualities:np.ndarray = None) -> np.ndarray:
+        """Get the average sell price of every fish. See CatchableData.get_average_value"""
+        qualities = self.get_quality_proportions(player) if (qualities is None) else qualities
+        final_price = compensated_sum([np.floor(self.price * scale) * qualities[:, column] for column, scale in enumerate(PRICE_SCALES)])
+        return np.floor(final_price * skill_bonus)
+
+    def get_average_xps(self, player:Player, treasure = False, qualities:np.ndarray = None) -> np.ndarray:
+        """Get the average XP from catching every fish. See CatchableData.get_average_xp"""
+        qualities = self.get_quality_proportions(player) if (qualities is None) else qualities
+        resultant_xp = np.zeros(len(self))
+        for column, quality in enumerate(QUALITIES):
+            resultant_xp += np.floor((quality + 1) * 3 * qualities[:, column])
+        resultant_xp = np.floor(resultant_xp + (self.difficulty / 3))
+        resultant_xp = np.floor(resultant_xp * (2.4 * self.get_pct_perfect(player)))
+        if treasure: resultant_xp = np.floor(resultant_xp * 2.2)
+        return np.where(self.legendary, np.floor(resultant_xp * 5), resultant_xp)
+
+    def get_values_and_xps(self, player:Player) -> tuple[np.ndarray, np.ndarray]:
+        """Get both the average value and average XP of every fish, sharing the quality proportions between the two."""
+        qualities = self.get_quality_proportions(player)
+        return self.get_average_values(player, qualities=qualities), self.get_average_xps(player, qualities=qualities)
@@ -8,6 +8,7 @@ Copyright (C) 2024 Romayne (Contact @ https://github.com/MyNameIsRomayne)
 """
 
 from math import floor
+import threading
 import numpy as np
 
 import constants
@@ -17,32 +18,89 @@ import config_paths
 import stardewfish.game_reader as gr
 
 from stardewfish.base_object      import BaseObject
+from stardewfish.fish_index       import FishIndex
+from stardewfish.fish_table       import FishTable
 from stardewfish.furniture_object import FurnitureObject
-from stardewfish.probs_algorithm  import get_probs, get_probs_with_target
+from stardewfish.probs_algorithm  import get_probs_batched, get_probs_with_target, pad_prob_lists
 from stardewfish.player_object    import Player
+from stardewfish.scenario         import Scenario
+from stardewfish.stage_cache      import StageCache, get_fish_key
+from stardewfish.time_index       import TimeIndex
 from stardewfish.utils            import clamp
 
 class GameObject():
     
     def __init__(self, player:Player = None):
-        # Setup object data
-        self.season  = config.SEASON
-        self.weather = config.WEATHER
-        self.time    = config.TIME
-        self.player = (player) if (player != None) else (Player())
-        self.daily_luck = 0
-
-        self.base_objects:dict[str, BaseObject]           = gr.get_objects(config_paths.FILE_JSON_OBJECTS,   config_paths.FILE_PYOBJECTS_BASEOBJECT,   BaseObject)
-        self.fish_objects:dict[str, CatchableData]        = gr.get_objects(config_paths.FILE_JSON_FISH,      config_paths.FILE_PYOBJECTS_FISH,      CatchableData)
-        self.location_objects:dict[str, GameLocation]     = gr.get_objects(config_paths.FILE_JSON_LOCATIONS, config_paths.FILE_PYOBJECTS_GAMELOCATION, GameLocation)
-        self.furniture_objects:dict[str, FurnitureObject] = gr.get_objects(config_paths.FILE_JSON_FURNITURE, config_paths.FILE_PYOBJECTS_FURNITURE, FurnitureObject)
-
-    def post_init(self):
-        """Handles the post-init phase, for creating associations between object classes after they are all initialized."""
-        [self.fish_objects[key].post_setup() for key in self.fish_objects]
-        for location in [self.location_objects[key] for key in self.location_objects]:
-            [fish_loc.post_setup() for fish_loc in location.fish]
-            
+        # The scenario used by anything which isn't handed one explicitly, made from the config
+        self.scenario = Scenario(player=player) if (player != None) else Scenario()
+
+        # Every dataset lives in the one snapshot, which isn't opened (or checked) until one of them is first used, and then
+        # objects are only read out as they're needed. Associations between objects are made as each one is read (see on_load)
+        source = gr.SnapshotSource(config_paths.FILE_SNAPSHOT_GAMEDATA, get_datasets(), get_snapshot_classes())
+
+        self.base_objects:dict[str, BaseObject]           = gr.get_objects(source, "objects")
+        self.fish_objects:dict[str, CatchableData]        = gr.get_objects(source, "fish",      lambda fish: fish.post_setup(self))
+        self.location_objects:dict[str, GameLocation]     = gr.get_objects(source, "locations", lambda location: location.post_setup(self))
+        self.furniture_objects:dict[str, FurnitureObject] = gr.get_objects(source, "furniture")
+        # Every fish packed into numpy columns, made the first time it's needed
+        self.fish_table:FishTable|None = None
+        # Every fish's catch time windows, made the first time it's needed
+        self.time_index:TimeIndex|None = None
+        # Where each item can be caught from, made the first time it's needed
+        self.fish_index:FishIndex|None = None
+        # Results of each stage of working out compositions, so a scenario change only redoes what depends on it
+        self.stages = StageCache(STAGE_CACHE_SIZE)
+        # Held while making any of the above which are made the first time they're needed, so only one thread makes each
+        self.lock = threading.RLock()
+
+    def get_fish_table(self) -> FishTable:
+        """Get the table of every fish, for working out chances/values/xp of many fish at once."""
+        with self.lock:
+            if self.fish_table == None:
+                self.fish_table = FishTable(self.fish_objects, self.base_objects)
+        return self.fish_table
+
+    def get_time_index(self) -> TimeIndex:
+        """Get the index of every fish's catch times, for finding when in the day which fish are catchable changes."""
+        with self.lock:
+            if self.time_index == None:
+                self.time_index = TimeIndex(self.fish_objects)
+        return self.time_index
+
+    def get_fish_index(self) -> FishIndex:
+        """Get the index of every location's fish spawns by item, for finding which areas an item can be caught in."""
+        with self.lock:
+            if self.fish_index == None:
+                self.fish_index = FishIndex(self.location_objects)
+        return self.fish_index
+
+    def get_catchable_inputs(self, scenario:Scenario) -> tuple:
+        """
+        What the catchable stage depends on in a scenario. That's the time window the time falls in (see TimeIndex) rather
+        than the time itself, since every time in a window has the same fish.
+        """
+        return (self.get_time_index().get_window_start(scenario.time),) + self.stages.get_inputs("catchable", scenario)
+
+    def get_default_inheritance(self, scenario:Scenario) -> tuple[list["FishLocation"], list[float]]:
+        """
+        Get the fish every other location inherits from Default which are catchable in a scenario, along with the chance of
+        each fish itself (see get_fish_chances). This is the same for every area of every location, so it's only worked
+        out once per scenario and then shared.
+        """
+        inherited_fish = self.get_inherited_fish(scenario)
+        chances_key = ("Default", get_fish_key(inherited_fish)) + self.stages.get_inputs("chances", scenario)
+        return inherited_fish, self.stages.get("chances", chances_key, lambda: get_fish_chances(inherited_fish, scenario, game_data=self))
+
+    def get_inherited_fish(self, scenario:Scenario) -> list["FishLocation"]:
+        """Get the fish every other location inherits from Default which are catchable in a scenario."""
+        catchable_key = ("Default", "inherited") + self.get_catchable_inputs(scenario)
+        return self.stages.get("catchable", catchable_key,
+                               lambda: filter_catchable_fish(self.location_objects["Default"].get_inheritable_fish(), scenario, self))
+
+    def get_fish_stats(self, scenario:Scenario) -> tuple[dict[str, int], list[float], list[float]]:
+        """Get the average value and XP of every fish for the player of a scenario (see get_fish_stats)."""
+        return self.stages.get("stats", self.stages.get_inputs("stats", scenario), lambda: get_fish_stats(scenario, self))
+
 class GameLocation():
 
     def __init__(self, id:str, json_data:dict):
@@ -50,39 +108,93 @@ class GameLocation():
         self.fish:list[FishLocation] = [FishLocation(data_json) for data_json in json_data["Fish"]]
         # FishAreas is a dict keyed by location ID, we just need to show location IDs to users. Noone cares about crab pots/bounds right? >:3
         self.areas = [key for key in json_data["FishAreas"].keys()]
+        # Indexes into self.fish of the fish in each area ID (None for no particular area), and of the ones other
+        # locations can inherit from this one. Made once here so looking up an area doesn't go through every fish
+        self.fish_by_area:dict[str|None, list[int]] = {}
+        for index, fish in enumerate(self.fish):
+            self.fish_by_area.setdefault(fish.fishareaid, []).append(index)
+        self.inheritable_fish:list[int] = [index for index, fish in enumerate(self.fish) if fish.can_be_inherited]
+
+    @staticmethod
+    def get_json_fields() -> list[str]:
+        """The fields of a Locations.json entry this reads. Everything else (forage, artifact spots, music..) is skipped."""
+        return ["Fish", "FishAreas"]
+
+    def post_setup(self, game_data:"GameObject") -> None:
+        """Gets the objects for all of this location's fish, after initial setup. game_data is the GameObject it was loaded by."""
+        self.game = game_data
+        [fish_loc.post_setup(game_data) for fish_loc in self.fish]
 
     def get_fish_in_subarea(self, target_id:str|None) -> list["FishLocation"]:
         """
         Get all the fish which are associated with a certain area_id.
         If the target_id is None, all fish with no particular area ID will be returned.
         """
-        fish_in_area:list[FishLocation] = []
-        for fish in self.fish:
-            if fish.fishareaid == target_id:
-                fish_in_area.append(fish)
-        return fish_in_area
+        return [self.fish[index] for index in self.fish_by_area.get(target_id, [])]
 
-    def get_area_composition(self, target_id:str|None):
+    def get_inheritable_fish(self) -> list["FishLocation"]:
+        """Get all the fish which other locations can inherit from this one (only ever used for Default)."""
+        return [self.fish[index] for index in self.inheritable_fish]
+
+    def get_catchable_fish(self, target_id:str|None, scenario:Scenario = None) -> list["FishLocation"]:
         """
-        Get the composition of catchable fish in this area which correspond to a particular area ID.
+        Get the fish in this area which can be caught in a scenario (default self.game.scenario), ignoring inherited ones.
+        Only redone when something the catchable stage depends on changes (see STAGE_INPUTS).
+        """
+        scenario = get_scenario(scenario, self.game)
+        catchable_key = (self.id, target_id) + self.game.get_catchable_inputs(scenario)
+        return self.game.stages.get("catchable", catchable_key, lambda: filter_catchable_fish(self.get_fish_in_subarea(target_id), scenario, self.game))
+
+    def get_area_key(self, target_id:str|None, scenario:Scenario = None) -> tuple|None:
+        """
+        Get what the precedence groups of an area depend on in a scenario (default self.game.scenario), or None if nothing is
+        catchable there. This is which fish are catchable rather than the time/weather/season, so scenarios which only
+        differ by those get the same key when they have the same fish.
+        """
+        scenario = get_scenario(scenario, self.game)
+        fish_catchable_in_area = self.get_catchable_fish(target_id, scenario)
+        if (not len(fish_catchable_in_area)):
+            return None
+        inherited_key = get_fish_key(self.game.get_inherited_fish(scenario)) if (self.id != "Default") else ()
+        return (self.id, target_id, get_fish_key(fish_catchable_in_area), inherited_key) + self.game.stages.get_inputs("chances", scenario)
+
+    def get_area_precedence_groups(self, target_id:str|None, scenario:Scenario = None):
+        """
+        Get the catchable fish in this area which correspond to a particular area ID, split into precedence groups.
         If target_id is None, all fish with no particular area ID will be used.
+        scenario: the scenario to get them for. Defaults to self.game.scenario
+        Returns a tuple of (all catchable fish, groups) where groups go from low to high precedence as the game would,
+        and each group is a tuple of (fish in the group, chance of each, index of the targeted bait fish or None).
+        If nothing is catchable, returns None.
         """
-        # All of the fish within the area
-        fish_in_area:list[FishLocation] = self.get_fish_in_subarea(target_id)
+        scenario = get_scenario(scenario, self.game)
+        area_key = self.get_area_key(target_id, scenario)
+        if area_key == None:
+            # nothing catchable here except maybe trash, not worth reporting
+            return None
+        return self.get_area_groups_from_key(target_id, area_key, scenario)
+
+    def get_area_groups_from_key(self, target_id:str|None, area_key:tuple, scenario:Scenario):
+        """Same as get_area_precedence_groups, for an area whose key (see get_area_key) was already gotten."""
+        return self.game.stages.get("groups", area_key, lambda: self.build_area_precedence_groups(target_id, scenario))
+
+    def build_area_precedence_groups(self, target_id:str|None, scenario:Scenario):
+        """Work out the precedence groups of an area with something catchable in it. See get_area_precedence_groups"""
         # All of the fish which can be caught in the area, according to player and game data
-        fish_catchable_in_area = filter_catchable_fish(fish_in_area)
+        fish_catchable_in_area = self.get_catchable_fish(target_id, scenario)
         # The catchable fish in the area, placed into a dictionary keyed by their precedence values.
         # This is done to properly get the weights of each, as fish order is first done by precedence and then randomly.
         fish_by_precedence:dict[str, list[FishLocation]] = {}
 
-        if (not len(fish_catchable_in_area)):
-            # nothing catchable here except maybe trash, not worth reporting
-            return {}
-        
+        # The chance of each fish itself, worked out for the whole area at once
+        fish_chances = get_fish_chances(fish_catchable_in_area, scenario, game_data=self.game)
+
         # If the area isn't the default, it will inherit catchables from the Default location
         # I guess technically default could inherit itself but it just makes a mess for no reason to not do this check
         if (self.id != "Default"):
-            fish_catchable_in_area += filter_catchable_fish([loc for loc in game.location_objects["Default"].fish])
+            inherited_fish, inherited_chances = self.game.get_default_inheritance(scenario)
+            fish_catchable_in_area = fish_catchable_in_area + inherited_fish
+            fish_chances = fish_chances + inherited_chances
         
         # Sort the fish by precedence into fish_by_precedence
         for catchable in fish_catchable_in_area:
@@ -97,89 +209,50 @@ class GameLocation():
         precedence_groups.sort()
         precedence_groups = [str(e) for e in precedence_groups]
 
-        composition_data:dict[str, list] = {
-            "fish"    : fish_catchable_in_area,
-            "chances" : [],
-            "xp"      : [],
-            "coins"   : []
-        }
-
-        # Variables for easy reference to the above
-        chances_list:list[float]     = composition_data["chances"]
-        xp_list:list[float]          = composition_data["xp"]
-        coins_list:list[float]       = composition_data["coins"]
+        using_targeted_bait = scenario.player.bait == constants.FISHING_BAIT_TARGETED
+        targeted_bait_id = scenario.player.bait_target_id
 
-        # Keep a running total of how likely it is we get to the current 
-        chance_pass_all_previous = 1
-
-        using_targeted_bait = game.player.bait == constants.FISHING_BAIT_TARGETED
-        targeted_bait_id = game.player.bait_target_id
+        specific_fish_chances = {id(fish_loc): chance for fish_loc, chance in zip(fish_catchable_in_area, fish_chances)}
 
         # Get the chance for each fish within a precedence group
+        groups:list[tuple[list[FishLocation], list[float], int|None]] = []
         for group in precedence_groups:
             chance_list = [] # temporary storage for the chance of each fish in the group
             target_fish_index = None # index of our targeted fish, if we have one in here
             for index, fish_loc in enumerate(fish_by_precedence[group]):
-                if (fish_loc.itemids[0].id == targeted_bait_id):
+                if (using_targeted_bait) and (fish_loc.itemids[0].id == targeted_bait_id):
                     target_fish_index = index
-                specific_fish_chance = 1
-                fish_id = fish_loc.itemids[0].id
-                if fish_id in game.fish_objects.keys():
-                    fish_object = game.fish_objects[fish_id]
-                    specific_fish_chance = fish_object.get_average_chance(fish_loc)
-                chance_list.append(fish_loc.chance * specific_fish_chance)
-            
-            if ((using_targeted_bait) and (target_fish_index != None)):
-                current_weights = get_probs_with_target(np.array(chance_list), target=target_fish_index, rerolls=2)
-            else:
-                # Normal weights with untargeted bait. Also targeted bait with fish not in this segment (it has the same result)
-                current_weights = get_probs(np.array(chance_list))
-            sum_current_weights = sum(current_weights)
-            reduced_weights = [weight * chance_pass_all_previous for weight in current_weights]
+                chance_list.append(fish_loc.chance * specific_fish_chances[id(fish_loc)])
+            groups.append((fish_by_precedence[group], chance_list, target_fish_index))
 
-            chances_list += reduced_weights
-            chance_pass_all_previous *= (1 - sum_current_weights)
-    
-            # Add price/xp stats
-            for fish in fish_by_precedence[group]:
-                sum_coins = 0
-                sum_xp = 0
-                # Handle getting all the objects to use
-                for loot_id in [obj.id for obj in fish.itemids]:
-                    value, xp = 0, 3
-                    # Coins might be yoinkable from here first if it isnt a fish
-                    if loot_id in game.base_objects.keys():
-                        value = game.base_objects[loot_id].price
-                    # If it is, we can get coins AND xp
-                    if loot_id in game.fish_objects.keys():
-                        value = game.fish_objects[loot_id].get_average_value()
-                        xp = game.fish_objects[loot_id].get_average_xp()
-                    # Finally, add it to the sum
-                    sum_coins += value
-                    sum_xp += xp
-                # Got all the catchables, add relevant data to lists
-                coins_list.append(sum_coins/len(fish.itemids))
-                xp_list.append(sum_xp/len(fish.itemids))
-            
-        return composition_data
+        return fish_catchable_in_area, groups
 
-    def get_composition(self):
+    def get_area_composition(self, target_id:str|None, scenario:Scenario = None):
         """
-        Get some information about the location's sublocation compositions
+        Get the composition of catchable fish in this area which correspond to a particular area ID.
+        If target_id is None, all fish with no particular area ID will be used.
+        scenario: the scenario to get it for. Defaults to self.game.scenario
         """
-        loc_dict:dict[str, dict[str, list[GameLocation]]] = {}
+        scenario = get_scenario(scenario, self.game)
+        area_key = self.get_area_key(target_id, scenario)
+        if area_key == None:
+            return {}
+        return self.get_area_composition_from_key(target_id, area_key, scenario)
 
-        # Go over each sublocation in the location and process *those* individually
-        loc_dict["none"] = self.get_area_composition(None)
+    def get_area_composition_from_key(self, target_id:str|None, area_key:tuple, scenario:Scenario):
+        """Same as get_area_composition, for an area whose key (see get_area_key) was already gotten."""
+        def build_composition():
+            _, groups = self.get_area_groups_from_key(target_id, area_key, scenario)
+            weights = self.game.stages.get("weights", area_key, lambda: get_group_weights(groups))
+            return build_area_composition(groups, weights, self.game.get_fish_stats(scenario), scenario, self.game)
+        return self.game.stages.get("composition", (area_key, self.game.stages.get_inputs("stats", scenario)), build_composition)
 
-        for area in self.areas:
-            area_data = self.get_area_composition(area)
-            # Empty, dont care about it
-            if area_data == {}:
-                continue
-            loc_dict[area] = area_data
-        
-        return loc_dict
+    def get_composition(self, scenario:Scenario = None):
+        """
+        Get some information about the location's sublocation compositions
+        scenario: the scenario to get it for. Defaults to self.game.scenario
+        """
+        return get_compositions([self], scenario)[0]
 
 class FishLocation():
     
@@ -206,6 +279,8 @@ class FishLocation():
         self.chanceboostperlucklevel  = json_data["ChanceBoostPerLuckLevel"]
         self.quality                  = json_data["Quality"]
         self.condition                = json_data["Condition"]
+        # The condition split up ahead of time, so filtering doesn't have to parse it again every time
+        self.parsed_condition         = FishCondition(self.condition)
 
         self.itemids:list[BaseObject] = parse_item_ids(json_data)
     
@@ -219,16 +294,59 @@ class FishLocation():
     def __str__(self):
         return self.itemids[0].name
 
-    def post_setup(self):
+    def post_setup(self, game_data:"GameObject"):
         """
-        Gets the objects from the itemids parsed after initial setup.
+        Gets the objects from the itemids parsed after initial setup, out of the GameObject it was loaded by.
         """
         if self.setup_itemids: return self.itemids
         if "RANDOM_FISH" not in self.itemids:
+            item_type_objects = {"(O)": game_data.base_objects, "(F)": game_data.furniture_objects}
             self.itemids = [get_object_from_id(itemid, item_type_objects) for itemid in self.itemids]
         self.setup_itemids = True
         return self.itemids
 
+class FishCondition():
+    """
+    The parts of a fish spawn's Condition (a comma-delimited list of game state queries) which filtering cares about,
+    worked out once when the spawn data is loaded.
+    Any clauses this doesn't understand are kept as they are in unknown, but don't affect filtering.
+    """
+
+    # Query names that are pulled out into their own attributes
+    KNOWN_QUERIES = ["LEGENDARY_FAMILY", "DROP_QI_BEANS", "IS_PASSIVE_FESTIVAL_OPEN", "LOCATION_SEASON", "WEATHER"]
+
+    def __init__(self, conditions:str|None):
+        # Whether it's one of Mr. Qi's legendary family fish, drops Qi beans, or only shows up at a festival
+        self.legendary_family = False
+        self.drops_qi_beans   = False
+        self.festival         = False
+        # Lowercase tokens of the LOCATION_SEASON/WEATHER clause, if there is one. A season/weather has to be in here to pass
+        self.seasons:frozenset[str]|None  = None
+        self.weathers:frozenset[str]|None = None
+        self.unknown:list[str] = []
+        if not conditions:
+            return
+        self.legendary_family = "LEGENDARY_FAMILY" in conditions
+        self.drops_qi_beans   = "DROP_QI_BEANS" in conditions
+        self.festival         = "IS_PASSIVE_FESTIVAL_OPEN" in conditions
+        # "LOCATION_SEASON Here spring fall" fuckin why
+        condition_season = get_condition(conditions, "LOCATION_SEASON")
+        if condition_season != False:
+            self.seasons = frozenset(str(token).lower() for token in condition_season.split(" "))
+        # WEATHER Here Rain Storm (this is used literally ONE time for legendary fish.)
+        condition_weather = get_condition(conditions, "WEATHER")
+        if condition_weather != False:
+            self.weathers = frozenset(str(token).lower() for token in condition_weather.split(" "))
+        self.unknown = [clause.strip() for clause in conditions.split(",") if not any(query in clause for query in self.KNOWN_QUERIES)]
+
+    def allows(self, season:str, weather:str) -> bool:
+        """Whether the season and weather clauses (if any) let this spawn happen in season and weather."""
+        if (self.seasons != None) and (season not in self.seasons):
+            return False
+        if (self.weathers != None) and (weather not in self.weathers):
+            return False
+        return True
+
 class CatchableData():
 
     def __init__(self, id, data:str):
@@ -307,22 +425,30 @@ class CatchableData():
             self.locations          = split_data[INDEX_LOCATIONS]
             self.tutorial_eligible  = split_data[INDEX_TUTORIAL_ELIGIBLE]
 
-    def post_setup(self) -> None:
+    def post_setup(self, game_data:"GameObject") -> None:
+        """
+        Gets the game object associated with this catchable after initial setup, out of the GameObject it was loaded by.
+        """
+        self.game = game_data
+        self.fish_object = game_data.base_objects[self.id]
+
+    def get_catch_windows(self) -> list[tuple[int, int]]:
         """
-        Gets the game object associated with this catchable after initial setup.
+        Get the times this can be caught between as (start, end) pairs, start inclusive and end exclusive.
+        catch_time is these flattened, so 600 1200 1800 2600 is 6:00AM until noon, and 6:00PM until 2:00AM.
         """
-        self.fish_object = game.base_objects[self.id]
+        return [(self.catch_time[i], self.catch_time[i + 1]) for i in range(0, len(self.catch_time) - 1, 2)]
 
     def get_seasons(self) -> list[str]:
         """Get all seasons this fish is catchable."""
-        related_object = game.base_objects[self.id]
+        related_object = self.game.base_objects[self.id]
         season_context_tags = [str(tag) for tag in related_object.context_tags if "season_" in tag]
         season_context_tags = [tag.replace("season_", '').title() for tag in season_context_tags]
         return season_context_tags
 
     def get_locations(self) -> list[str]:
         """Get all locations where this fish is catchable."""
-        related_object = game.base_objects[self.id]
+        related_object = self.game.base_objects[self.id]
         location_context_tags = [str(tag) for tag in related_object.context_tags if "fish_" in tag]
         location_context_tags = [tag.replace("fish_", " ").replace("_", '').title().strip() for tag in location_context_tags]
         location_context_tags = [tag for tag in location_context_tags if tag in constants.ALL_LOCATIONS]
@@ -336,9 +462,9 @@ class CatchableData():
         """Gets whether this fish is a legendary fish."""
         return (self.fish_object.context_tags != None) and ("fish_legendary" in self.fish_object.context_tags)
 
-    def get_fish_size_ranges(self) -> tuple[float, float]:
+    def get_fish_size_ranges(self, scenario:Scenario = None) -> tuple[float, float]:
         """
-        Gets the range of sizes this fish may be within for the current player conditions.
+        Gets the range of sizes this fish may be within for the player conditions of a scenario (default self.game.scenario).
         """
         """
         Ok now that the doc comment is over, dev's note: i hate this. it was supposed to just be
@@ -348,15 +474,16 @@ class CatchableData():
         its not skill+2 /10, its RAND(min(5, floor(skill+2/10)), 5) / 5f (rand is inclusive)
         basically this whole function is just me coping with [worst_case*range*worst_case, best_case*range*best_case]
         """
+        player = get_scenario(scenario, self.game).player
         # Level contributions to fish size
-        min_level_contribution = 1 + floor(game.player.fishing_level / 2)
+        min_level_contribution = 1 + floor(player.fishing_level / 2)
         max_level_contribution = max(6, min_level_contribution) / 5
         min_level_contribution /= 5
         # RNG contributions to fish size
         min_rng_contribution = 0.9
         max_rng_contribution = 1.1
         # Zone contribution to fish size
-        baseFishSize = (game.player.fishing_depth/5)
+        baseFishSize = (player.fishing_depth/5)
         # Min/max size based off worst/best case scenarios
         minFishSize, maxFishSize = (min_level_contribution * baseFishSize * min_rng_contribution), (max_level_contribution * baseFishSize * max_rng_contribution)
         return minFishSize, maxFishSize
@@ -367,32 +494,46 @@ class CatchableData():
         elif size < 0.66: return constants.QUALITY_SILVER
         else:             return constants.QUALITY_GOLD
 
-    def get_pct_perfect(self) -> float:
-        """Get the percent of perfects for this fish.
-        Returns game.player.pct_perfect directly if DO_PERFECTION_DIFFICULTY_SCALE is false.
+    def get_pct_perfect(self, scenario:Scenario = None) -> float:
+        """Get the percent of perfects for this fish, in a scenario (default self.game.scenario).
+        Returns the player's pct_perfect directly if they don't scale it by difficulty (scale_perfect_by_difficulty).
         """
-        if not config.DO_PERFECTION_DIFFICULTY_SCALE:
-            return game.player.pct_perfect
+        player = get_scenario(scenario, self.game).player
+        if not player.scale_perfect_by_difficulty:
+            return player.pct_perfect
         # A level 1 player will do worse a la fishing bar size than a level 10, account for this. Slightly.
         # 10 is the ideal value here, with each level below subtracting a (subjective) 5% (level 14 does 1.2x, which, sure, i guess.)
-        scaled_pct_level      = 0.5 + (0.05 * game.player.fishing_level)
+        scaled_pct_level      = 0.5 + (0.05 * player.fishing_level)
         # 50 should be the 'tipping point' of which below perfection should be easier, and above harder.
         # Specifically, a carp gets a 1.3x, and a glacierfish gets a 0.5x. Not perfect, but better than nothing
         scaled_pct_difficulty = (1.5 - self.difficulty/100)
-        return clamp(game.player.pct_perfect*scaled_pct_difficulty*scaled_pct_level, 0, 1)
+        return clamp(player.pct_perfect*scaled_pct_difficulty*scaled_pct_level, 0, 1)
 
-    def get_quality_proportions(self) -> dict[int, float]:
+    def get_player_key(self, scenario:Scenario) -> tuple:
         """
-        Gets the percent of fish that should be of a certain quality. It returns in the order of 
+        What this fish's size, quality, value and XP depend on in a scenario: which fish it is, and the player values
+        of the stats stage (see STAGE_INPUTS). Changing anything else about the player doesn't change them.
+        """
+        return (self.id,) + self.game.stages.get_inputs("stats", scenario)
+
+    def get_quality_proportions(self, scenario:Scenario = None) -> dict[int, float]:
+        """
+        Gets the percent of fish that should be of a certain quality, in a scenario (default self.game.scenario). It returns in the order of 
         QUALITY_NORMAL, QUALITY_SILVER, QUALITY_GOLD, QUALITY_IRIDIUM as (float, float, float, float).
+        Only worked out once per fish and player, see build_quality_proportions.
         """
+        scenario = get_scenario(scenario, self.game)
+        return dict(self.game.stages.get("fish quality", self.get_player_key(scenario), lambda: self.build_quality_proportions(scenario)))
+
+    def build_quality_proportions(self, scenario:Scenario) -> dict[int, float]:
+        """Work out the quality proportions of this fish. See get_quality_proportions"""
         qualities = {
             constants.QUALITY_NORMAL  : 0,
             constants.QUALITY_SILVER  : 0,
             constants.QUALITY_GOLD    : 0,
             constants.QUALITY_IRIDIUM : 0
         }
-        min_size, max_size = self.get_fish_size_ranges()
+        min_size, max_size = self.get_fish_size_ranges(scenario)
         min_quality, max_quality = self.get_absolute_fish_quality(min_size), self.get_absolute_fish_quality(max_size)
         if min_quality == max_quality:
             # shortcuts~
@@ -412,7 +553,7 @@ class CatchableData():
                 b = max(min_size, bounds_min)
                 qualities[iter] = max(0, (a - b) / size_range)
 
-        scaled_pct_perfect = self.get_pct_perfect()
+        scaled_pct_perfect = self.get_pct_perfect(scenario)
 
         if scaled_pct_perfect == 0:
             return qualities # because yuss
@@ -429,23 +570,26 @@ class CatchableData():
         qualities[constants.QUALITY_IRIDIUM] += split_from_gold
         return qualities
 
-    def get_average_chance(self, location_data:FishLocation=None):
+    def get_average_chance(self, location_data:FishLocation=None, scenario:Scenario = None):
         """
         Gets the average chance that this particular fish should be caught, given some parameters.
         Namely, it uses the same exact calculations found in GameLocation.cs, line 13937-13974.
+        scenario: the scenario to get it for. Defaults to self.game.scenario
         """
+        scenario = get_scenario(scenario, self.game)
+        player = scenario.player
 
         # Handle using location data, if applicable
         apply_daily_luck    = False
         chance_mode         = "stack" # default
         chance_modifiers    = None
         curiosity_lure_buff = 0
-        fishing_level       = game.player.fishing_level
-        water_depth         = game.player.fishing_depth
-        is_training_rod     = (game.player.fishing_rod == constants.FISHING_ROD_TRAINING)
-        curiosity_lure      = (game.player.lure == constants.FISHING_LURE_CURIOSITY)
-        bait_targets_fish   = (game.player.bait == constants.FISHING_BAIT_TARGETED
-                               and game.player.bait_target_id == self.id)
+        fishing_level       = player.fishing_level
+        water_depth         = player.fishing_depth
+        is_training_rod     = (player.fishing_rod == constants.FISHING_ROD_TRAINING)
+        curiosity_lure      = (player.lure == constants.FISHING_LURE_CURIOSITY)
+        bait_targets_fish   = (player.bait == constants.FISHING_BAIT_TARGETED
+                               and player.bait_target_id == self.id)
 
         if location_data != None:
             chance_mode         = location_data.chancemodifiermode
@@ -469,13 +613,19 @@ class CatchableData():
                 min_val = 0.08
                 chance = (max_val - min_val) / max_val * chance + (max_val - min_val) / 2
         chance = (chance * (4/3)) if (bait_targets_fish) else (chance)
-        chance = (chance + game.daily_luck) if (apply_daily_luck) else (chance)
+        chance = (chance + scenario.daily_luck) if (apply_daily_luck) else (chance)
         if (chance_modifiers == None) or (not len(chance_modifiers)):
             return chance
         return apply_chance_modifiers(chance, chance_modifiers, chance_mode)
 
-    def get_average_value(self, skill_bonus = constants.SKILL_NONE):
-        fish_quality = self.get_quality_proportions()
+    def get_average_value(self, skill_bonus = constants.SKILL_NONE, scenario:Scenario = None):
+        """Get the average sell price of this fish in a scenario (default self.game.scenario), once per fish and player."""
+        scenario = get_scenario(scenario, self.game)
+        return self.game.stages.get("fish value", self.get_player_key(scenario) + (skill_bonus,),
+                               lambda: self.build_average_value(skill_bonus, scenario))
+
+    def build_average_value(self, skill_bonus, scenario:Scenario):
+        fish_quality = self.get_quality_proportions(scenario)
         base_price = self.fish_object.price
         scaled_final_prices = []
         for quality in fish_quality.keys():
@@ -483,53 +633,47 @@ class CatchableData():
         final_price = sum(scaled_final_prices)
         return floor(final_price * skill_bonus)
     
-    def get_average_xp(self, treasure = False):
+    def get_average_xp(self, treasure = False, scenario:Scenario = None):
+        """Get the average XP from catching this fish in a scenario (default self.game.scenario), once per fish and player."""
+        scenario = get_scenario(scenario, self.game)
+        return self.game.stages.get("fish xp", self.get_player_key(scenario) + (treasure,),
+                               lambda: self.build_average_xp(treasure, scenario))
+
+    def build_average_xp(self, treasure, scenario:Scenario):
         # https://stardewvalleywiki.com/Fishing#Experience_Points 1.6.8
         if self.is_trap(): return 5 # Crab pots always net 5xp, no matter what
 
-        fish_quality = self.get_quality_proportions()
+        fish_quality = self.get_quality_proportions(scenario)
         scaled_quality_xp = []
         for quality in fish_quality.keys():
             scaled_quality_xp.append( floor((quality + 1) * 3 * fish_quality[quality]) )
         resultant_xp = sum(scaled_quality_xp)
         resultant_xp = floor(resultant_xp + (float(self.difficulty) / 3))
         # Handle proportional adjustment to XP gains
-        perfect_xp = 2.4 * self.get_pct_perfect()
+        perfect_xp = 2.4 * self.get_pct_perfect(scenario)
         resultant_xp = floor(resultant_xp * perfect_xp)
         if treasure: resultant_xp = floor(resultant_xp * 2.2)
         if self.is_legendary(): resultant_xp = floor(resultant_xp * 5)
         return resultant_xp
 
     def has_subdata(self):
-        return (self.id in game.fish_objects.keys())
+        return (self.id in self.game.fish_objects.keys())
 
-    def fish_satisfies_subdata(self):
+    def fish_satisfies_subdata(self, scenario:Scenario = None):
+        scenario = get_scenario(scenario, self.game)
         # Satisfies by default if is trap/not in fish data
         if not self.has_subdata():
             return True
         if self.is_trap():
             return True
-        # Check time. 1 2 3 4 is two checks for between 1 and 2, or between 3 and 4
-        amt_intervals = int(len(self.catch_time)/2)
-        passed_any_interval = False
-        for interval in range(amt_intervals):
-            interval_start = int(self.catch_time[(interval * 2) + 0])
-            interval_end = int(self.catch_time[(interval * 2) + 1])
-            # Inclusive, time may equal start time
-            if game.time < interval_start:
-                continue
-            # Exclusive, time may not equal end time
-            if game.time >= interval_end:
-                continue
-            passed_any_interval = True
-            break
-        if not passed_any_interval:
+        # Check time, against the windows the time index already split catch_time into
+        if not self.game.get_time_index().is_catchable_at(self.id, scenario.time):
             return False
         # Seasons are unused, weather is still used
         if self.weather == "both":
             # Any weather, I guess? greenRain is new but idk.
             return True
-        elif self.weather != game.weather:
+        elif self.weather != scenario.weather:
             return False
         else:
             # weather == game weather
@@ -537,6 +681,203 @@ class CatchableData():
 
 # Static functions (helpers)
 
+def get_group_weights(groups:list[tuple[list[FishLocation], list[float], int|None]]) -> list[np.ndarray]:
+    """
+    Get the weights (chance each fish is the one caught from its group) of every precedence group passed in.
+    Groups without the targeted bait fish all go through get_probs_batched together in one go.
+    """
+    weights:list[np.ndarray] = [None]*len(groups)
+    untargeted = [i for i, group in enumerate(groups) if group[2] == None]
+    if len(untargeted):
+        padded, lengths = pad_prob_lists([groups[i][1] for i in untargeted])
+        batched = get_probs_batched(padded, lengths)
+        for row, i in enumerate(untargeted):
+            weights[i] = batched[row, :lengths[row]]
+    for i, (_, chance_list, target_fish_index) in enumerate(groups):
+        if target_fish_index != None:
+            weights[i] = get_probs_with_target(np.array(chance_list), target=target_fish_index, rerolls=2)
+    return weights
+
+def get_game(game_data:GameObject|None) -> GameObject:
+    """
+    Get the GameObject passed in, or game if there wasn't one. Everything which reads game data or keeps results takes
+    the GameObject to use for it, or gets it from the locations/fish passed in (which know the one they were loaded by).
+    """
+    return game_data if (game_data != None) else game
+
+def get_locations_game(locations:list[GameLocation]) -> GameObject:
+    """Get the GameObject some locations were loaded by, or game if there aren't any."""
+    return locations[0].game if len(locations) else game
+
+def get_scenario(scenario:Scenario|None, game_data:GameObject = None) -> Scenario:
+    """Get the scenario passed in, or the scenario of game_data (default game) if there wasn't one."""
+    return scenario if (scenario != None) else get_game(game_data).scenario
+
+def get_fish_chances(fish_locs:list[FishLocation], scenario:Scenario = None, target_all:bool = False,
+                     game_data:GameObject = None) -> list[float]:
+    """
+    Get the chance of the fish itself for each spawn in fish_locs (see CatchableData.get_average_chance), or 1 for
+    anything not in Data/Fish. Everything in the fish table is worked out in one vectorized call.
+    target_all: get each fish's chance as if it was what the targeted bait was on (see FishTable.get_chances)
+    game_data: the GameObject the fish were loaded by. Defaults to game
+    """
+    game_data = get_game(game_data)
+    scenario = get_scenario(scenario, game_data)
+    fish_table = game_data.get_fish_table()
+    chances:list[float] = [1]*len(fish_locs)
+    table_indexes = [i for i, fish_loc in enumerate(fish_locs) if fish_loc.itemids[0].id in fish_table.index]
+    if len(table_indexes):
+        table_locs = [fish_locs[i] for i in table_indexes]
+        table_chances = fish_table.get_chances(
+            [fish_table.index[fish_loc.itemids[0].id] for fish_loc in table_locs], scenario.player, scenario.daily_luck,
+            np.array([fish_loc.curiosity_lure_buff for fish_loc in table_locs], dtype=np.float64),
+            np.array([bool(fish_loc.apply_daily_luck) for fish_loc in table_locs], dtype=bool), target_all)
+        for i, fish_loc, chance in zip(table_indexes, table_locs, table_chances.tolist()):
+            if (fish_loc.chancemodifiers != None) and len(fish_loc.chancemodifiers):
+                chance = apply_chance_modifiers(chance, fish_loc.chancemodifiers, fish_loc.chancemodifiermode)
+            chances[i] = chance
+    # Anything else in Data/Fish (crab pot catches) goes the long way
+    for i, fish_loc in enumerate(fish_locs):
+        fish_id = fish_loc.itemids[0].id
+        if (fish_id not in fish_table.index) and (fish_id in game_data.fish_objects):
+            chances[i] = game_data.fish_objects[fish_id].get_average_chance(fish_loc, scenario)
+    return chances
+
+def get_fish_stats(scenario:Scenario = None, game_data:GameObject = None) -> tuple[dict[str, int], list[float], list[float]]:
+    """
+    Get the fish table's index with the average value and average XP of every fish in it, for the player of a scenario.
+    game_data: the GameObject to get the fish table of. Defaults to game
+    """
+    game_data = get_game(game_data)
+    fish_table = game_data.get_fish_table()
+    values, xps = fish_table.get_values_and_xps(get_scenario(scenario, game_data).player)
+    return fish_table.index, values.tolist(), xps.tolist()
+
+def build_area_composition(groups:list[tuple[list[FishLocation], list[float], int|None]],
+                           weights:list[np.ndarray],
+                           fish_stats:tuple[dict[str, int], list[float], list[float]]|None = None,
+                           scenario:Scenario = None,
+                           game_data:GameObject = None) -> dict[str, list]:
+    """
+    Puts the precedence groups of an area and their weights together into that area's composition data.
+    fish_stats: the result of get_fish_stats, if it was already worked out for this scenario.
+    scenario: the scenario the groups were made for. Defaults to the scenario of game_data
+    game_data: the GameObject the groups' fish were loaded by. Defaults to game
+    """
+    game_data = get_game(game_data)
+    scenario = get_scenario(scenario, game_data)
+    fish_index, fish_values, fish_xps = fish_stats if (fish_stats != None) else get_fish_stats(scenario, game_data)
+    composition_data:dict[str, list] = {
+        # In the same order as the groups, which is the order the chances come out in
+        "fish"    : [fish for group_fish, _, _ in groups for fish in group_fish],
+        "chances" : [],
+        "xp"      : [],
+        "coins"   : []
+    }
+
+    # Variables for easy reference to the above
+    chances_list:list[float]     = composition_data["chances"]
+    xp_list:list[float]          = composition_data["xp"]
+    coins_list:list[float]       = composition_data["coins"]
+
+    # Keep a running total of how likely it is we get to the current 
+    chance_pass_all_previous = 1
+
+    for (group_fish, _, _), current_weights in zip(groups, weights):
+        sum_current_weights = sum(current_weights)
+        reduced_weights = [weight * chance_pass_all_previous for weight in current_weights]
+
+        chances_list += reduced_weights
+        chance_pass_all_previous *= (1 - sum_current_weights)
+
+        # Add price/xp stats
+        for fish in group_fish:
+            coins, xp = get_fish_loc_stats(fish, (fish_index, fish_values, fish_xps), scenario, game_data)
+            coins_list.append(coins)
+            xp_list.append(xp)
+
+    return composition_data
+
+def get_fish_loc_stats(fish:FishLocation, fish_stats:tuple[dict[str, int], list[float], list[float]], scenario:Scenario,
+                       game_data:GameObject = None) -> tuple[float, float]:
+    """
+    Get the average coins and XP of catching a fish spawn, averaged over its item IDs if it picks one of a few.
+    fish_stats: the result of get_fish_stats for the scenario.
+    game_data: the GameObject the fish was loaded by. Defaults to game
+    """
+    game_data = get_game(game_data)
+    fish_index, fish_values, fish_xps = fish_stats
+    sum_coins = 0
+    sum_xp = 0
+    # Handle getting all the objects to use
+    for loot_id in [obj.id for obj in fish.itemids]:
+        value, xp = 0, 3
+        # Coins might be yoinkable from here first if it isnt a fish
+        if loot_id in game_data.base_objects.keys():
+            value = game_data.base_objects[loot_id].price
+        # If it is, we can get coins AND xp
+        if loot_id in fish_index:
+            value = fish_values[fish_index[loot_id]]
+            xp = fish_xps[fish_index[loot_id]]
+        elif loot_id in game_data.fish_objects.keys():
+            value = game_data.fish_objects[loot_id].get_average_value(scenario=scenario)
+            xp = game_data.fish_objects[loot_id].get_average_xp(scenario=scenario)
+        # Finally, add it to the sum
+        sum_coins += value
+        sum_xp += xp
+    return sum_coins/len(fish.itemids), sum_xp/len(fish.itemids)
+
+def weigh_areas(areas:list[tuple[GameLocation, str|None, Scenario]]) -> list[tuple|None]:
+    """
+    Get the area key (see GameLocation.get_area_key) of each (location, area ID, scenario) in areas, making sure
+    the stages of the GameObject each location was loaded by have the weights of each. The precedence groups of every
+    area which isn't in there yet are weighed in a single batched call, so they can be as many areas and scenarios as need be.
+    """
+    area_keys:list[tuple|None] = []
+    # The stages each unweighed area goes in, its key, and its groups, by which stages and key
+    unweighed:dict[tuple[int, tuple], tuple[StageCache, tuple, list]] = {}
+    for location, area, scenario in areas:
+        area_key = location.get_area_key(area, scenario)
+        area_keys.append(area_key)
+        stages = location.game.stages
+        if (area_key == None) or ((id(stages), area_key) in unweighed) or stages.has("weights", area_key):
+            continue
+        unweighed[(id(stages), area_key)] = (stages, area_key, location.get_area_groups_from_key(area, area_key, scenario)[1])
+    all_weights = iter(get_group_weights([group for _, _, groups in unweighed.values() for group in groups]))
+    for stages, area_key, groups in unweighed.values():
+        stages.put("weights", area_key, [next(all_weights) for _ in groups])
+    return area_keys
+
+def get_compositions(locations:list[GameLocation], scenario:Scenario = None) -> list[dict[str, dict[str, list]]]:
+    """
+    Get the sublocation compositions (see GameLocation.get_composition) of many locations at once.
+    The precedence groups of every area which isn't in the stages already are weighed in a single batched call.
+    Compositions are shared with the stages of the GameObject the locations were loaded by, so they shouldn't be changed.
+    scenario: the scenario to get them for. Defaults to the scenario of that GameObject
+    """
+    scenario = get_scenario(scenario, get_locations_game(locations))
+    # Weigh every area first
+    areas = [(location, area, scenario) for location in locations for area in [None] + location.areas]
+    area_keys = iter(weigh_areas(areas))
+
+    # Then put each area's composition together from its weights
+    results:list[dict[str, dict[str, list]]] = []
+    for location in locations:
+        loc_dict:dict[str, dict[str, list]] = {}
+        for area in [None] + location.areas:
+            area_key = next(area_keys)
+            area_data = {}
+            if area_key != None:
+                area_data = location.get_area_composition_from_key(area, area_key, scenario)
+            # No particular area is always kept, other areas are only kept if not empty
+            if area == None:
+                loc_dict["none"] = area_data
+            elif area_data != {}:
+                loc_dict[area] = area_data
+        results.append(loc_dict)
+    return results
+
+
 
 def get_object_from_id(object_id:str, item_type_jsons:dict):
     object_type, object_id = process_raw_id(object_id)
@@ -667,8 +1008,9 @@ def get_condition(conditions:str|None, target) -> str|bool:
             return condition
     return False
 
-def try_get_catchable(itemid:str) -> bool|CatchableData:
-    return (game.fish_objects[itemid]) if (itemid in game.fish_objects.keys()) else (False)
+def try_get_catchable(itemid:str, game_data:GameObject = None) -> bool|CatchableData:
+    game_data = get_game(game_data)
+    return (game_data.fish_objects[itemid]) if (itemid in game_data.fish_objects.keys()) else (False)
 
 
 """
@@ -677,23 +1019,30 @@ def try_get_catchable(itemid:str) -> bool|CatchableData:
         # Passed, add to appropriate location
 """
 
-def filter_catchable_fish(subloc_fish:list[FishLocation]):
+def filter_catchable_fish(subloc_fish:list[FishLocation], scenario:Scenario = None, game_data:GameObject = None):
+    """
+    Get the fish spawns in subloc_fish which can actually be caught in a scenario (default the scenario of game_data).
+    game_data: the GameObject the fish were loaded by. Defaults to game
+    """
+    game_data = get_game(game_data)
+    scenario = get_scenario(scenario, game_data)
     passed_fish:list[FishLocation] = []
     for fish_loc in subloc_fish:
         # Ignore one-time catchables (anything that sets flag on catch does this)
         if (fish_loc.set_flag_on_catch != None):
             continue
         # Ignore boss fish
-        if (config.IGNORE_LEGENDARY_FISH and fish_loc.isbossfish):
+        if (scenario.ignore_legendary_fish and fish_loc.isbossfish):
             continue
+        condition = fish_loc.parsed_condition
         # Ignore QI quest fish
-        if (fish_loc.condition) and (config.IGNORE_MR_QI) and not fish_loc.isbossfish and ("LEGENDARY_FAMILY" in fish_loc.condition):
+        if (condition.legendary_family) and (scenario.ignore_mr_qi) and not fish_loc.isbossfish:
             continue
         # Ignore QI beans
-        if (fish_loc.condition) and (config.IGNORE_MR_QI) and ("DROP_QI_BEANS" in fish_loc.condition):
+        if (condition.drops_qi_beans) and (scenario.ignore_mr_qi):
             continue
         # Ignore festival fish
-        if (fish_loc.condition) and ("IS_PASSIVE_FESTIVAL_OPEN" in fish_loc.condition):
+        if (condition.festival):
             continue
         # Ignore fish which choose a random one from sublocation (TODO: Don't do that)
         if ("RANDOM_FISH" in fish_loc.itemids):
@@ -702,43 +1051,44 @@ def filter_catchable_fish(subloc_fish:list[FishLocation]):
         if (None in fish_loc.itemids):
             continue
         # Filter for Data/Fish
-        presumed_fish = try_get_catchable(fish_loc.itemids[0].id)
-        if (presumed_fish) and (not fish_loc.ignoresubdata) and (not presumed_fish.fish_satisfies_subdata()):
+        presumed_fish = try_get_catchable(fish_loc.itemids[0].id, game_data)
+        if (presumed_fish) and (not fish_loc.ignoresubdata) and (not presumed_fish.fish_satisfies_subdata(scenario)):
                 continue
         # Filter magic bait
-        if (fish_loc.requiremagicbait) and (not game.player.bait == constants.FISHING_BAIT_MAGIC):
+        if (fish_loc.requiremagicbait) and (not scenario.player.bait == constants.FISHING_BAIT_MAGIC):
             continue
         # Filter by season (none in season param means any season)
-        if (fish_loc.season != None) and (str(fish_loc.season).lower() != game.season):
+        if (fish_loc.season != None) and (str(fish_loc.season).lower() != scenario.season):
+            continue
+        # The season param is one thing, but the conditions can also have LOCATION_SEASON and WEATHER clauses
+        # (weather is done in fish_satisfies_subdata for the most part)
+        if not condition.allows(scenario.season, scenario.weather):
             continue
-        # The season param is one thing, but the conditions also need parsing to check for LOCATION_SEASON (grr)
-        # "LOCATION_SEASON Here spring fall" fuckin why
-        condition_season = get_condition(fish_loc.condition, "LOCATION_SEASON")
-        if condition_season != False:
-            # Get all arguments as lowercase strings. helps for case-insensitive season checking.
-            tokens = [str(token).lower() for token in condition_season.split(" ")]
-            # It should look something like ["location_season", "here", "spring", "fall"] now
-            if (game.season not in tokens):
-                continue
-        # Filter by weather is done in fish_satisfies_subdata for the most part
-        # WEATHER Here Rain Storm (this is used literally ONE time for legendary fish.)
-        condition_weather = get_condition(fish_loc.condition, "WEATHER")
-        if condition_weather != False:
-            # Get all arguments as lowercase strings. helps for case-insensitive season checking.
-            tokens = [str(token).lower() for token in condition_weather.split(" ")]
-            # It should look something like ["weather", "here", "rain", "storm"] now
-            if game.weather not in tokens:
-                continue
         # Filter by time is done in fish_satisfies_subdata
         # Filtering complete by location/season/weather/time, add as one of those which pass
         passed_fish.append(fish_loc)
     return passed_fish
 
+def get_datasets() -> dict[str, tuple[str, type, list[str]|None]]:
+    """
+    The JSON file and class each dataset in the game data snapshot is made from, keyed by section name.
+    Also holds which fields of each JSON entry the class reads (None for all of them), so nothing else gets kept while loading.
+    """
+    return {
+        "objects"   : (config_paths.FILE_JSON_OBJECTS,   BaseObject,      BaseObject.get_json_fields()),
+        "fish"      : (config_paths.FILE_JSON_FISH,      CatchableData,   None),
+        "locations" : (config_paths.FILE_JSON_LOCATIONS, GameLocation,    GameLocation.get_json_fields()),
+        "furniture" : (config_paths.FILE_JSON_FURNITURE, FurnitureObject, None),
+    }
+
+def get_snapshot_classes() -> dict[str, type]:
+    """Every class which can be stored in the game data snapshot, keyed by name."""
+    return {class_type.__name__: class_type for class_type in [BaseObject, CatchableData, GameLocation, FishLocation, FishCondition, FurnitureObject]}
+
 # Static vars (more helpers)
 
-game = GameObject()
+# How many results of each stage GameObject keeps at once (see StageCache)
+STAGE_CACHE_SIZE = 4096
 
-item_type_objects = {
-    "(O)": game.base_objects,
-    "(F)": game.furniture_objects,
-}
+# The GameObject made from the config, used by the queries and by anything not handed one explicitly
+game = GameObject()
@@ -1,78 +1,246 @@
 """
 File for reading and storing the data turned XNB.
+Everything read from the JSON is kept in one snapshot file (see snapshot.py), with one section per dataset.
+A section is only rebuilt from its JSON when the fingerprint of that JSON file stops matching, or the section is damaged.
 Copyright (C) 2024 Romayne (Contact @ https://github.com/MyNameIsRomayne)
 """
 
-import config_paths
-from stardewfish.utils import read_file_json, ensure_file_exists
-import pickle
-from win32api import GetFileVersionInfo, LOWORD, HIWORD
-
-def get_version() -> str:
-    """
-    Get the current version of the unpacked content.
-    returns: A number representing the build number, e.g. 1.6.8.24119"
-    Modified from https://stackoverflow.com/questions/580924/how-to-access-a-files-properties-on-windows
-    """
-    info = GetFileVersionInfo(str(config_paths.FILE_STARDEW_EXECUTABLE), "\\")
-    ms = info['FileVersionMS']
-    ls = info['FileVersionLS']
-    return ".".join([str(n) for n in [HIWORD(ms), LOWORD(ms), HIWORD(ls), LOWORD(ls)]])
-
-def save_objects(objects:dict[str], file_path:str) -> None:
-    """
-    Saves all XNBObjects of the dictionary passed in into the respective file, pickled as a list.
-    objects: the dictionary of objects to save.
-    """
-    current_version = get_version()
-    # Create file if it doesn't exist yet
-    ensure_file_exists(file_path, create=True)
-    with open(file_path, "wb") as file:
-        as_list:list = [objects[key] for key in objects.keys()]
-        # Append version data
-        as_list.append(current_version)
-        pickle.dump(as_list, file)
-
-def load_objects(file_path:str) -> tuple[ dict[str]|None, str ]:
-    """
-    Loads all pickled XNBObjects from the appropriate file.
-    Plucks the version stored at the end and returns that as well.
-    Returns: A tuple containing the dictionary of objects, and a string of the version number.
-    If the file is missing, returns None and an empty string.
-    """
-    version = ""
-    object_list:list
-    object_dict:dict[str] = {}
-    # It dont exist
-    if not ensure_file_exists(file_path, create=False):
-        return None, version
-    # It do exist
-    with open(file_path, "rb") as file:
-        object_list = pickle.load(file)
-    # Get the version (always at last)
-    version = object_list.pop()
-    for item in object_list:
-        object_dict[item.id] = item
-    return object_dict, version
-
-def get_objects(file_path:str, file_path_py:str, class_type:type) -> dict[str]:
-    """
-    Get all the objects into a dictionary keyed by their ID.
-    If there is a .dat file storing these objects from the appropriate version,
-    this function will take from there instead.
+import config
+from stardewfish.utils import iter_file_json_records
+from stardewfish.snapshot import Snapshot, SnapshotTable, encode_section, write_snapshot
+from stardewfish import worker_pool
+from collections.abc import Mapping
+import hashlib
+import os
+import threading
+
+# Bump whenever the objects stored in the caches change shape (new/renamed attributes), so old caches get rebuilt
+DATA_VERSION = 3
+
+# How much JSON (in bytes, across every dataset being rebuilt) there has to be before the rebuild is split across workers
+PARALLEL_REBUILD_MIN_BYTES = 1 << 20
+
+def hash_file(file_path:str) -> str:
+    """Get a hash of the contents of some file, as a hex string."""
+    hasher = hashlib.blake2b(digest_size=20)
+    with open(str(file_path), "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+def get_cache_settings() -> dict[str]:
+    """Settings which change what ends up in the caches, so a cache made with different ones shouldn't be used."""
+    return {"ignore_irrelevant_json": config.IGNORE_IRRELEVANT_JSON, "data_version": DATA_VERSION}
+
+def get_fingerprint(file_path:str, content_hash:str|None = None) -> dict[str]:
+    """
+    Get the fingerprint of a source JSON file, used to tell whether a cache made from it is still good.
+    It holds the file's size and modified time (cheap to check) and a hash of its contents (certain, but needs the whole file read).
+    Also holds any settings which change what gets cached.
+    content_hash: the hash of the file, if it was already worked out. Otherwise it is worked out here.
+    """
+    stat = os.stat(str(file_path))
+    return {
+        "size"     : stat.st_size,
+        "mtime_ns" : stat.st_mtime_ns,
+        "hash"     : content_hash if (content_hash != None) else hash_file(file_path),
+        "settings" : get_cache_settings(),
+    }
+
+def check_fingerprint(file_path:str, fingerprint) -> tuple[bool, str|None]:
+    """
+    Check whether a stored fingerprint still matches the source file.
+    If the size and modified time match, that's taken as good enough without reading the file.
+    If they don't, the file is hashed, since it might have just been touched/copied without changing.
+    Returns whether it matches, and the file's hash if one had to be worked out (None otherwise).
+    """
+    if (not isinstance(fingerprint, dict)) or (fingerprint.get("settings") != get_cache_settings()):
+        return False, None
+    stat = os.stat(str(file_path))
+    if (stat.st_size == fingerprint.get("size")) and (stat.st_mtime_ns == fingerprint.get("mtime_ns")):
+        return True, None
+    content_hash = hash_file(file_path)
+    return content_hash == fingerprint.get("hash"), content_hash
+
+def build_objects(file_path:str, class_type:type, fields:list[str]|None = None) -> dict[str]:
+    """
+    Read all the objects of a JSON file into a dictionary keyed by their ID.
+    The file is streamed an entry at a time, so the whole JSON document is never held in memory at once.
+    fields: the only fields of each entry class_type reads, if it doesn't need all of them.
     Returns: A dictionary keyed by item IDs, corresponding to objects instantiated with class_type.
     """
-    # Try to load from file first.
-    # The performance hit from version mismatch is minor due to how infrequently it will change
-    current_version = get_version()
-    file_objects, version = load_objects(file_path_py)
-    if version == current_version:
-        return file_objects
-    # It failed, read from JSON file
-    as_json = read_file_json(file_path)
     new_objects:dict[str, class_type] = {}
-    for object_key in as_json.keys():
-        new_objects[object_key] = class_type(object_key, as_json[object_key])
-    # Lastly, make sure we have that file for later
-    save_objects(new_objects, file_path_py)
+    for object_key, object_json in iter_file_json_records(file_path, fields):
+        new_objects[object_key] = class_type(object_key, object_json)
     return new_objects
+
+def encode_dataset(file_path:str, class_type:type, fields:list[str]|None, classes:dict[str, type]) -> tuple[bytes, dict]:
+    """Build one dataset from its JSON file and encode it as a snapshot section. This is what workers run on a rebuild."""
+    return encode_section(build_objects(file_path, class_type, fields), classes)
+
+def encode_datasets(jobs:list[tuple[str, type, list[str]|None, dict[str, type]]]) -> list[tuple[bytes, dict]]:
+    """
+    Encode several datasets (each job being the args to encode_dataset), in the same order.
+    If there's enough JSON to be worth it, each one is built in its own worker, so the whole rebuild only takes
+    about as long as the biggest file does.
+    """
+    total_size = sum(os.stat(str(job[0])).st_size for job in jobs)
+    if (len(jobs) > 1) and (total_size >= PARALLEL_REBUILD_MIN_BYTES) and worker_pool.should_parallelize():
+        return worker_pool.run_chunks(encode_dataset, jobs)
+    return [encode_dataset(*job) for job in jobs]
+
+def get_snapshot(snapshot_path:str, datasets:dict[str, tuple[str, type, list[str]|None]], classes:dict[str, type],
+                 names:list[str]|None = None, verify:bool = True, damaged:list[str] = []) -> Snapshot:
+    """
+    Get the snapshot holding the datasets in names, up to date with the JSON files they come from.
+    Sections which are still good are copied over as-is, and only the ones whose JSON changed (or which fail their checksum)
+    get rebuilt.
+    If nothing in names needs rebuilding, the other sections are left how they are (and get checked whenever they're
+    asked for themselves). If something does, every stale section is rebuilt together, in parallel, and written in one go.
+    snapshot_path: where the snapshot file is kept.
+    datasets: the JSON file path, class and fields read (None for all) of each dataset, keyed by section name.
+    classes: every class which may be stored in the snapshot, keyed by name.
+    names: the sections to check. Defaults to all of them.
+    verify: whether to check the sections in names against their checksums too. If not, only their fingerprints are
+    checked (no section data is read), and the checksum is left for whoever reads the section. Sections copied into a
+    rewrite are always checked first either way.
+    damaged: sections already found to fail their checksum, which get rebuilt no matter what.
+    """
+    names = list(datasets.keys()) if (names == None) else names
+    snapshot = Snapshot.try_open(snapshot_path)
+    sections = snapshot.sections if (snapshot != None) else {}
+    stale:list[str] = []
+    fingerprints:dict[str, dict] = {}
+
+    def check_section(name:str, verify:bool) -> None:
+        file_path = datasets[name][0]
+        fingerprint = sections[name]["fingerprint"] if (name in sections) else None
+        matches, content_hash = check_fingerprint(file_path, fingerprint)
+        # A section that got damaged on disk is rebuilt as if its JSON changed
+        if matches and ((name in damaged) or (verify and (not snapshot.check_section(name)))):
+            matches = False
+        if not matches:
+            stale.append(name)
+            fingerprints[name] = get_fingerprint(file_path, content_hash)
+        elif content_hash != None:
+            # Same contents, but the file was touched. Save the new size/time so next time is the fast path again
+            fingerprints[name] = get_fingerprint(file_path, content_hash)
+        else:
+            fingerprints[name] = fingerprint
+
+    for name in names:
+        check_section(name, verify)
+    if (snapshot != None) and (not len(stale)) and all(fingerprints[name] == sections[name]["fingerprint"] for name in names):
+        return snapshot
+
+    # The file is getting rewritten anyway, so bring every other section up to date in the same go
+    for name in datasets:
+        if name not in fingerprints:
+            check_section(name, False)
+    # Sections which are kept get copied over as-is, so make sure they're intact first
+    for name in datasets:
+        if (name not in stale) and (not snapshot.check_section(name)):
+            stale.append(name)
+            fingerprints[name] = get_fingerprint(datasets[name][0])
+    encoded = encode_datasets([(*datasets[name], classes) for name in stale])
+    new_sections:dict[str, tuple[bytes, dict]] = dict(zip(stale, encoded))
+    for name in datasets:
+        if name not in stale:
+            new_sections[name] = (snapshot.get_section_bytes(name), sections[name]["descriptor"])
+    if snapshot != None:
+        snapshot.close()
+    write_snapshot(snapshot_path, new_sections, {name: {"fingerprint": fingerprints[name]} for name in new_sections})
+    return Snapshot(snapshot_path)
+
+class SnapshotSource():
+    """
+    The one snapshot every dataset of a GameObject is read from. It's opened the first time any of them is used, and
+    every section's fingerprint is checked then, so anything stale is rebuilt before a single table has the file mapped
+    (a mapped file can't be replaced on Windows). After that, each dataset just gets its table out of the same open snapshot.
+    A section's checksum is only checked the first time its table is asked for, so a cold start only reads the sections
+    a query uses. If one turns out to be damaged, every table is let go of and the snapshot is rebuilt (see rebuild).
+    """
+
+    def __init__(self, snapshot_path:str, datasets:dict[str, tuple[str, type, list[str]|None]], classes:dict[str, type]):
+        self.snapshot_path = snapshot_path
+        self.datasets = datasets
+        self.classes = classes
+        self.snapshot:Snapshot|None = None
+        self.lock = threading.Lock()
+
+    def get_snapshot(self) -> Snapshot:
+        with self.lock:
+            if self.snapshot == None:
+                self.snapshot = get_snapshot(self.snapshot_path, self.datasets, self.classes, verify=False)
+            return self.snapshot
+
+    def rebuild(self, damaged:list[str]) -> Snapshot:
+        """
+        Close the snapshot (so tables made from it can't read any more) and rebuild the damaged sections through the
+        same source. Tables already handed out need getting again, see LazyObjects.get_table.
+        """
+        with self.lock:
+            if self.snapshot != None:
+                self.snapshot.close()
+            self.snapshot = get_snapshot(self.snapshot_path, self.datasets, self.classes, verify=False, damaged=damaged)
+            return self.snapshot
+
+    def get_table(self, name:str, on_load = None) -> SnapshotTable:
+        """Get the table of one dataset, checking its section is intact first. See Snapshot.get_table"""
+        snapshot = self.get_snapshot()
+        with self.lock:
+            intact = snapshot.check_section(name)
+        if not intact:
+            snapshot = self.rebuild([name])
+        return snapshot.get_table(name, self.classes, on_load)
+
+class LazyObjects(Mapping):
+    """
+    A read-only, dict-like stand-in for one dataset of the snapshot, keyed by ID.
+    Nothing is opened, checked or rebuilt until one of the source's datasets is first used. After that it's just the
+    snapshot's table for the dataset, which reads objects out as they are asked for.
+    """
+
+    def __init__(self, source:SnapshotSource, name:str, on_load = None):
+        self.source = source
+        self.name = name
+        self.on_load = on_load
+        self.table:SnapshotTable|None = None
+        # The snapshot the table was read from. If the source had to rebuild since, the table is gotten again
+        self.snapshot:Snapshot|None = None
+        self.lock = threading.Lock()
+
+    def get_table(self) -> SnapshotTable:
+        # "is" rather than ==, since comparing Mappings with == goes through every item
+        if (self.table is None) or (self.snapshot is not self.source.snapshot):
+            with self.lock:
+                if (self.table is None) or (self.snapshot is not self.source.snapshot):
+                    self.table = self.source.get_table(self.name, self.on_load)
+                    self.snapshot = self.source.snapshot
+        return self.table
+
+    def is_loaded(self) -> bool:
+        return self.table is not None
+
+    def __getitem__(self, key:str):
+        return self.get_table()[key]
+
+    def __contains__(self, key) -> bool:
+        return key in self.get_table()
+
+    def keys(self):
+        return self.get_table().keys()
+
+    def __iter__(self):
+        return iter(self.get_table())
+
+    def __len__(self) -> int:
+        return len(self.get_table())
+
+def get_objects(source:SnapshotSource, name:str, on_load = None) -> LazyObjects:
+    """
+    Get all the objects of one dataset in the snapshot, as a dict-like table keyed by their ID.
+    The dataset is only loaded when first used, and objects are read out of the snapshot as they are asked for.
+    on_load: called with each object the first time it is read.
+    """
+    return LazyObjects(source, name, on_load)
@@ -11,12 +11,11 @@ from stardewfish import game_object
 game = game_object.game
 
 def get_location_stats(locations=[]):
-    game.post_init()
     """Get location data from some game object."""
     BAIT_TARGET_NAME = (game.base_objects[config.BAIT_TARGET_ID].name) if (config.BAIT_USED == constants.FISHING_BAIT_TARGETED) else ("none")
     # Print out initial data
     initial_data = [
-        [f"Season: {game.season}", f"Weather: {game.weather}", f"Time: {utils.military_to_classic(config.TIME)}"],
+        [f"Season: {game.scenario.season}", f"Weather: {game.scenario.weather}", f"Time: {utils.military_to_classic(config.TIME)}"],
         [f"Depth: {config.WATER_DEPTH}", f"Bait: {config.BAIT_USED}", f"Bait Target: {BAIT_TARGET_NAME}"],
         [f"Fishing Level: {config.FISHING_LEVEL}", f"Perfect catches: {config.SCALE_PCT_PERFECT_CATCHES*100}%", f"Rod used: {config.ROD_USED}"]
     ]
@@ -24,7 +23,7 @@ def get_location_stats(locations=[]):
 
     use_locations = config.LOCATIONS if (len(locations) == 0) else locations
 
-    results = [game.location_objects[str(key).lower().title()].get_composition() for key in use_locations]
+    results = game_object.get_compositions([game.location_objects[str(key).lower().title()] for key in use_locations])
 
     printable_location_data:list[list[str]] = []
     row_len = 4
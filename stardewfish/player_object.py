@@ -3,16 +3,23 @@ File which contains the Player class, to hold fishing data which would depend on
 Copyright (C) 2024 Romayne (Contact @ https://github.com/MyNameIsRomayne)
 """
 
+from dataclasses import dataclass, field
+
 import config
 
+@dataclass(frozen=True)
 class Player():
-    """The player of the game in regards to what we care about. Which is fishing."""
-
-    def __init__(self):
-        self.fishing_level = config.FISHING_LEVEL
-        self.pct_perfect = config.SCALE_PCT_PERFECT_CATCHES
-        self.fishing_depth = config.WATER_DEPTH
-        self.bait = config.BAIT_USED
-        self.bait_target_id = config.BAIT_TARGET_ID
-        self.fishing_rod = config.ROD_USED
-        self.lure = config.LURE_USED
+    """
+    The player of the game in regards to what we care about. Which is fishing.
+    Anything not passed in comes from the config. It can't be changed after it's made, use dataclasses.replace
+    to get a copy with something different.
+    """
+    fishing_level:int  = field(default_factory=lambda: config.FISHING_LEVEL)
+    pct_perfect:float  = field(default_factory=lambda: config.SCALE_PCT_PERFECT_CATCHES)
+    fishing_depth:int  = field(default_factory=lambda: config.WATER_DEPTH)
+    bait:str           = field(default_factory=lambda: config.BAIT_USED)
+    bait_target_id:str = field(default_factory=lambda: config.BAIT_TARGET_ID)
+    fishing_rod:str    = field(default_factory=lambda: config.ROD_USED)
+    lure:str           = field(default_factory=lambda: config.LURE_USED)
+    # Whether how often each fish is caught perfectly is scaled by its difficulty and the player's level
+    scale_perfect_by_difficulty:bool = field(default_factory=lambda: config.DO_PERFECTION_DIFFICULTY_SCALE)
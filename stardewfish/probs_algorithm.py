@@ -1,12 +1,19 @@
 """
 Previous testing file which now just contains some unused helper functions, but more importantly, get_probs.
+process_permutation is kept around as the brute-force reference get_probs can be checked against.
 Copyright (C) 2024 Romayne (Contact @ https://github.com/MyNameIsRomayne)
 """
 
 import itertools
+from functools import lru_cache
 from math import factorial
 import numpy as np
-import multiprocessing
+
+from stardewfish import worker_pool
+from stardewfish.probs_cache import probs_cache, get_cache_key, QUANTIZE_DECIMALS
+
+# Roughly how many multiplications (rows * length * nodes) a batch needs before it's worth sending to the worker pool
+PARALLEL_MIN_WORK = 5_000_000
 
 def process_permutation(prob_list, prob_list_inverted, permutations):
     sum_probs = [0]*len(prob_list)
@@ -25,55 +32,220 @@ def process_permutation(prob_list, prob_list_inverted, permutations):
     final_sums = [i/total_permutations for i in sum_probs]
     return final_sums
 
+def process_permutation_with_target(prob_list, target, rerolls):
+    """Brute force version of get_probs_with_target, going over every ordering and every set of successes."""
+    sum_probs = [0]*len(prob_list)
+    for permutation in itertools.permutations(range(len(prob_list))):
+        for successes in itertools.product([False, True], repeat=len(prob_list)):
+            chance = np.prod([prob_list[i] if successes[i] else 1 - prob_list[i] for i in range(len(prob_list))])
+            rejected, fallback, caught = 0, None, None
+            for i in permutation:
+                if not successes[i]:
+                    continue
+                if i == target or rejected >= rerolls:
+                    caught = i
+                    break
+                fallback = i if fallback is None else fallback
+                rejected += 1
+            caught = fallback if caught is None else caught
+            if caught is not None:
+                sum_probs[caught] += chance
+    total_permutations = factorial(len(prob_list))
+    return [i/total_permutations for i in sum_probs]
+
 def ranges(N, nb):
     step = N / nb
     return [range(round(step*i), round(step*(i+1))) for i in range(nb)]
 
-def get_probs(prob_list:np.ndarray):
+@lru_cache(maxsize=None)
+def get_quadrature(amount_nodes:int) -> tuple[np.ndarray, np.ndarray]:
     """
-    WARNING: Highly unoptimized, will take extremely long for len>10.
-    That being said, this gets the average chance elements in prob_list at any position n
-    will succeed, given that prob_list is shuffled randomly.
+    Gauss-Legendre nodes and weights, moved from [-1, 1] onto [0, 1].
+    With n nodes, the integral of any polynomial of degree 2n-1 or less comes out exact.
     """
+    nodes, weights = np.polynomial.legendre.leggauss(amount_nodes)
+    return (nodes + 1) / 2, weights / 2
 
-    if len(prob_list) >= 9:
-        print(f"WARN: Prob list of length {len(prob_list)} entered into get_probs, this will take a while!")
-    elif len(prob_list) > 10:
-        raise TimeoutError("I refuse to let you take what will be approximately 5 minutes for this.")
+def exclusive_products(factors:np.ndarray, axis:int = 0) -> np.ndarray:
+    """
+    For each entry of factors along axis, get the product of every *other* entry along that axis (elementwise).
+    Done with prefix/suffix products instead of dividing, so zeroes and tiny numbers don't blow up.
+    """
+    factors = np.moveaxis(factors, axis, 0)
+    ones = np.ones((1,) + factors.shape[1:])
+    prefix = np.cumprod(np.concatenate([ones, factors[:-1]]), axis=0)
+    suffix = np.cumprod(np.concatenate([ones, factors[:0:-1]]), axis=0)[::-1]
+    return np.moveaxis(prefix * suffix, 0, axis)
 
-    # Helper var to reduce the amount of times prob_list needs to be inverted
-    prob_list_inverted = 1 - prob_list
-    
-    if len(prob_list) < 7:
-        # Below 5, its reasonable to just use the current process rather than deal with multiprocessing overhead
-        return process_permutation(prob_list, prob_list_inverted, itertools.permutations(range(len(prob_list))))
+def pad_prob_lists(prob_lists:list[list[float]]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Pack a bunch of differently sized prob lists into one zero-padded 2D array for get_probs_batched.
+    Returns the padded array (one row per list) and the length of each row.
+    """
+    lengths = np.array([len(prob_list) for prob_list in prob_lists], dtype=int)
+    padded = np.zeros((len(prob_lists), lengths.max(initial=0)))
+    for row, prob_list in enumerate(prob_lists):
+        padded[row, :lengths[row]] = prob_list
+    return padded, lengths
 
-    # Setup variables before sending off the worker processes
-    # Final collection list for the results
-    sum_probs = [0]*len(prob_list)
-    total_permutations = factorial(len(prob_list))
-    # Amount of processes should exceed total cores here
-    use_cores = 12
-    # Setup the ranges of permutations for our results to use
-    all_ranges = ranges(total_permutations, use_cores)
-    pending_results:list = []
-    pool = multiprocessing.Pool(processes=use_cores)
-    # Permutations need to be generated iteratively first, unfortunately, so do that
-    permutation_iterator = itertools.permutations(range(len(prob_list)))
-    for subrange in all_ranges:
-        split_permutation = []
-        for _ in subrange:
-            split_permutation.append(permutation_iterator.__next__())
-        async_result = pool.apply_async(process_permutation, (prob_list, prob_list_inverted, split_permutation))
-        pending_results.append( async_result )
-    
-    for result in pending_results:
-        sum_probs = [a + b for a, b in zip(sum_probs, result.get())]
-
-    return sum_probs
-
-def get_probs_with_target(prob_list:np.ndarray, target:int, rerolls:int = 2):
-    raise NotImplementedError
+def get_probs(prob_list:np.ndarray) -> np.ndarray:
+    """
+    Gets the average chance elements in prob_list at any position n will succeed
+    (be the first success), given that prob_list is shuffled randomly.
+
+    Instead of walking all n! orderings, this uses the fact that a random shuffle is the same as giving
+    every element a uniform random 'arrival time' t in [0, 1]. Element j lands before i with chance t, so
+    P(i is first success) = p_i * integral from 0 to 1 of prod(1 - p_j * t) over j != i.
+    The integrand is a polynomial of degree n-1, so Gauss-Legendre with n//2+1 nodes gets it exactly. O(n^2).
+    Chances are clamped to [0, 1], since that's how a roll against them behaves in-game.
+    Results are remembered in probs_cache, so the same list (in any order) is only worked out once.
+    """
+    prob_list = np.asarray(prob_list, dtype=float)
+    return get_probs_batched(prob_list[None, :])[0]
+
+def get_probs_batched(prob_lists:np.ndarray, lengths:np.ndarray = None, parallel:bool = True, use_cache:bool = True) -> np.ndarray:
+    """
+    get_probs for many prob lists (precedence groups, scenarios, ...) at once, in one pass.
+    prob_lists: 2D array with one prob list per row, padded out on the right. See pad_prob_lists.
+    lengths: how many entries of each row are real. Defaults to the whole row.
+    parallel: whether big enough batches may be split up by row across the worker pool.
+    use_cache: whether to look rows up in (and save them to) probs_cache. Repeated rows are only worked out once either way.
+    Returns an array the same shape as prob_lists, with padding entries set to 0.
+    Padding works for free here, as a chance of 0 never succeeds and so never changes anything else's odds.
+    """
+    prob_lists = np.clip(np.asarray(prob_lists, dtype=float), 0, 1)
+    if lengths is not None:
+        prob_lists = np.where(np.arange(prob_lists.shape[1]) < np.asarray(lengths)[:, None], prob_lists, 0)
+    if prob_lists.size == 0:
+        return np.zeros(prob_lists.shape)
+    if use_cache:
+        return get_probs_batched_cached(prob_lists, lengths, parallel)
+    amount_rows, length = prob_lists.shape
+    nodes, weights = get_quadrature(length // 2 + 1)
+
+    work = amount_rows * length * len(nodes)
+    if parallel and (work >= PARALLEL_MIN_WORK) and (amount_rows > 1) and worker_pool.should_parallelize():
+        # Split up by rows, each chunk gets done in one go by a worker
+        amount_chunks = min(amount_rows, worker_pool.get_worker_count())
+        chunks = [(prob_lists[subrange.start:subrange.stop], None, False, False) for subrange in ranges(amount_rows, amount_chunks)]
+        return np.concatenate(worker_pool.run_chunks(get_probs_batched, chunks))
+
+    # factors[row, i, k] is the chance element i doesn't succeed given it is before the element at time nodes[k]
+    factors = 1 - prob_lists[:, :, None] * nodes
+    return prob_lists * (exclusive_products(factors, axis=1) @ weights)
+
+def get_probs_batched_cached(prob_lists:np.ndarray, lengths:np.ndarray|None, parallel:bool) -> np.ndarray:
+    """
+    The probs_cache side of get_probs_batched. Rows found in the cache are filled in from there,
+    and the rest are worked out together (each distinct one once), then saved.
+    """
+    amount_rows, length = prob_lists.shape
+    if lengths is None:
+        lengths = np.full(amount_rows, length)
+    results = np.zeros(prob_lists.shape)
+    # Rows which need working out, by key. Rows with the same key share the one result
+    missing:dict[bytes, list[tuple[int, np.ndarray]]] = {}
+    missing_sorted:list[np.ndarray] = []
+    for row in range(amount_rows):
+        key, order = get_cache_key(prob_lists[row, :lengths[row]])
+        if key in missing:
+            probs_cache.count_hit()
+            missing[key].append((row, order))
+            continue
+        cached = probs_cache.get(key)
+        if cached is not None:
+            results[row, order] = cached
+            continue
+        missing[key] = [(row, order)]
+        missing_sorted.append(prob_lists[row, order])
+
+    if not len(missing):
+        return results
+    padded, missing_lengths = pad_prob_lists(missing_sorted)
+    worked_out = get_probs_batched(padded, missing_lengths, parallel, use_cache=False)
+    for (key, rows), result_row, result_length in zip(missing.items(), worked_out, missing_lengths):
+        result = result_row[:result_length]
+        probs_cache.put(key, result)
+        for row, order in rows:
+            results[row, order] = result
+    return results
+
+def exclusive_poly_products(constant:np.ndarray, linear:np.ndarray, degree:int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Multiplies out (constant[j] + linear[j]*x) over every row j, keeping only coefficients up to x^degree.
+    constant, linear: arrays of shape (n, nodes)
+    Returns the full product, shape (nodes, degree+1), and for each row the product of every *other*
+    row, shape (n, nodes, degree+1). Coefficients are along the last axis, lowest power first.
+    """
+    amount, amount_nodes = constant.shape
+    prefix = np.zeros((amount + 1, amount_nodes, degree + 1))
+    suffix = np.zeros((amount + 1, amount_nodes, degree + 1))
+    prefix[0, :, 0] = 1
+    suffix[amount, :, 0] = 1
+    for j in range(amount):
+        prefix[j+1] = prefix[j] * constant[j][:, None]
+        prefix[j+1, :, 1:] += prefix[j, :, :-1] * linear[j][:, None]
+    for j in range(amount - 1, -1, -1):
+        suffix[j] = suffix[j+1] * constant[j][:, None]
+        suffix[j, :, 1:] += suffix[j+1, :, :-1] * linear[j][:, None]
+    # Leave one out by multiplying everything before row j with everything after it
+    exclusive = np.zeros((amount, amount_nodes, degree + 1))
+    for power in range(degree + 1):
+        for split in range(power + 1):
+            exclusive[:, :, power] += prefix[:-1, :, split] * suffix[1:, :, power - split]
+    return prefix[amount], exclusive
+
+def get_probs_with_target(prob_list:np.ndarray, target:int, rerolls:int = 2) -> np.ndarray:
+    """
+    Same as get_probs, but for a group which contains the fish targeted by targeted bait.
+    Going through the shuffled group, a success on any fish other than the target gets rejected (with the first one
+    rejected kept as a fallback) until `rerolls` have been rejected, and the next success after that is kept.
+    A success on the target is always kept. If the group runs out with only rejected fish, the fallback is what's caught.
+    The total chance the group gives *something* is unchanged by this, it only moves weight onto the target.
+
+    Like get_probs, each probability is an integral over the 'arrival time' of one fish, except the fish before it
+    now get counted by how many of them succeeded, which is a truncated polynomial in x with rerolls+1 terms.
+    Everything is a polynomial of degree n-1 or less in time, so it is exact. O(n * nodes * rerolls^2).
+    Results are remembered in probs_cache, same as get_probs.
+    """
+    prob_list = np.clip(np.asarray(prob_list, dtype=float), 0, 1)
+    if rerolls <= 0:
+        return get_probs(prob_list)
+    # Only the other fish can be shuffled around for the key, the target keeps its own spot at the front
+    others = np.delete(np.arange(len(prob_list)), target)
+    key, order = get_cache_key(prob_list[others], "target", rerolls, round(prob_list[target], QUANTIZE_DECIMALS))
+    cached = probs_cache.get(key)
+    if cached is None:
+        cached = get_probs_with_target_uncached(np.concatenate([[prob_list[target]], prob_list[others][order]]), rerolls)
+        probs_cache.put(key, cached)
+    final_probs = np.zeros(len(prob_list))
+    final_probs[target] = cached[0]
+    final_probs[others[order]] = cached[1:]
+    return final_probs
+
+def get_probs_with_target_uncached(prob_list:np.ndarray, rerolls:int) -> np.ndarray:
+    """The actual work for get_probs_with_target, with the target always at index 0 and rerolls above 0."""
+    target = 0
+    target_prob = prob_list[target]
+    others = np.delete(np.arange(len(prob_list)), target)
+    other_probs = prob_list[others]
+    nodes, weights = get_quadrature(len(prob_list) // 2 + 1)
+    before = np.outer(other_probs, nodes)
+    # Other fish which succeed before the target, or before some other fish
+    all_before, each_before = exclusive_poly_products(1 - before, before, rerolls)
+    # Other fish which succeed after some other fish, given nothing before that fish succeeded
+    after = np.outer(other_probs, 1 - nodes)
+    _, each_after = exclusive_poly_products(np.repeat(1 - other_probs[:, None], len(nodes), axis=1), after, rerolls)
+
+    final_probs = np.zeros(len(prob_list))
+    # Target is kept if it succeeds with at most `rerolls` other fish succeeding before it
+    final_probs[target] = target_prob * (all_before.sum(axis=1) @ weights)
+    # Other fish are kept if they are the success right after `rerolls` rejections, and the target didn't get there first
+    kept_after_rerolls = (each_before[:, :, rerolls] * (1 - target_prob * nodes)) @ weights
+    # ...or if they are the first success, the target fails, and the group runs out before the rerolls do
+    kept_as_fallback = (1 - target_prob) * (each_after[:, :, :rerolls].sum(axis=2) @ weights)
+    final_probs[others] = other_probs * (kept_after_rerolls + kept_as_fallback)
+    return final_probs
 
 def get_subsets(nparray, sublen):
     """(Buggy, unused) get the subsets of some nparray by sublen."""
@@ -92,10 +264,16 @@ if __name__ == "__main__":
     )
     print(test)
     print(get_probs(test))
-    quit()
+    # Check against the brute force version while it is still bearable to run
+    for j in range(1, 8):
+        test = np.random.rand(j)
+        brute = process_permutation(test, 1 - test, itertools.permutations(range(j)))
+        print(f"{j}: max error {np.max(np.abs(np.array(brute) - get_probs(test)))}")
+    for j in range(1, 6):
+        test = np.random.rand(j)
+        brute = process_permutation_with_target(test, 0, 2)
+        print(f"{j} (targeted): max error {np.max(np.abs(np.array(brute) - get_probs_with_target(test, 0, 2)))}")
 
-    import time
-    for j in range(11):
-        start = time.perf_counter()
-        get_probs(np.array([0.25]*j))
-        print(f"{j}: {time.perf_counter() - start}")
+    test, lengths = pad_prob_lists([np.random.rand(j) for j in range(1, 8)])
+    batched = get_probs_batched(test, lengths)
+    print(f"batched: max error {max(np.max(np.abs(batched[j, :l] - get_probs(test[j, :l]))) for j, l in enumerate(lengths))}")
@@ -0,0 +1,99 @@
+"""
+File which holds ProbsCache, a bounded LRU cache for the results of get_probs and friends.
+The same chance lists come through over and over (every area inherits Default's fish, sweeps repeat groups, etc.),
+so results are kept keyed by the chance list itself. Since a shuffle doesn't care about order, the list is sorted first,
+and every chance is rounded a little so float noise from different code paths doesn't make two equal lists miss.
+Copyright (C) 2024 Romayne (Contact @ https://github.com/MyNameIsRomayne)
+"""
+
+from collections import OrderedDict
+import threading
+import numpy as np
+
+# Chances are rounded to this many decimal places for the key
+QUANTIZE_DECIMALS = 12
+
+class ProbsCache():
+    """A least-recently-used cache of probability results, keeping track of how often it's been useful. Safe to share between threads."""
+
+    def __init__(self, max_size:int = None):
+        # How many results to hold on to before the least recently used ones get dropped.
+        # None reads config.PROBS_CACHE_SIZE the first time it's needed, so importing this doesn't need the config files.
+        self.max_size = max_size
+        self.entries:OrderedDict[bytes, np.ndarray] = OrderedDict()
+        # Statistics
+        self.hits      = 0
+        self.misses    = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get_max_size(self) -> int:
+        """Get how many results this holds at most."""
+        if self.max_size == None:
+            import config
+            self.max_size = config.PROBS_CACHE_SIZE
+        return self.max_size
+
+    def get(self, key:bytes) -> np.ndarray|None:
+        """Get the result stored for key, or None if there isn't one. Counts as a hit or a miss."""
+        with self.lock:
+            result = self.entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def count_hit(self) -> None:
+        """Count a hit which didn't go through get, like a repeat of a key already being worked out."""
+        with self.lock:
+            self.hits += 1
+
+    def put(self, key:bytes, result:np.ndarray) -> None:
+        """
+        Store a result for key, dropping the least recently used results if there are too many.
+        A view (e.g. one row of a batch) is copied first, so it doesn't keep the whole array it's from alive.
+        """
+        if self.get_max_size() <= 0:
+            return
+        if result.base is not None:
+            result = result.copy()
+        with self.lock:
+            self.entries[key] = result
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.get_max_size():
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop everything stored, and reset the statistics."""
+        with self.lock:
+            self.entries.clear()
+            self.hits, self.misses, self.evictions = 0, 0, 0
+
+    def get_stats(self) -> dict[str, int|float]:
+        """Get the hit/miss/eviction statistics and current size as a dict."""
+        lookups = self.hits + self.misses
+        return {
+            "size"      : len(self.entries),
+            "max_size"  : self.get_max_size(),
+            "hits"      : self.hits,
+            "misses"    : self.misses,
+            "evictions" : self.evictions,
+            "hit_rate"  : (self.hits / lookups) if (lookups) else (0),
+        }
+
+def get_cache_key(prob_list:np.ndarray, *extra) -> tuple[bytes, np.ndarray]:
+    """
+    Get the key for prob_list (already clamped to [0, 1]), and the order which sorts it.
+    Results should be stored for the sorted list, and put back with result[order] = stored.
+    extra: anything else the result depends on, e.g. which function it came from. Goes in front of the key.
+    """
+    order = np.argsort(prob_list, kind="stable")
+    quantized = np.round(prob_list[order], QUANTIZE_DECIMALS)
+    prefix = repr(extra).encode() if len(extra) else b""
+    return prefix + quantized.tobytes(), order
+
+# The one cache shared by everything in this process
+probs_cache = ProbsCache()
@@ -0,0 +1,25 @@
+"""
+File which contains the Scenario class, the state of the game (and the player) some fishing data is worked out for.
+Copyright (C) 2024 Romayne (Contact @ https://github.com/MyNameIsRomayne)
+"""
+
+from dataclasses import dataclass, field
+
+import config
+from stardewfish.player_object import Player
+
+@dataclass(frozen=True)
+class Scenario():
+    """
+    When, in what weather, and by who some fishing happens.
+    Anything not passed in comes from the config. It can't be changed after it's made, so the same scenario can be
+    handed to several threads/processes at once. Use dataclasses.replace to get a copy with something different.
+    """
+    season:str       = field(default_factory=lambda: config.SEASON)
+    weather:str      = field(default_factory=lambda: config.WEATHER)
+    time:int         = field(default_factory=lambda: config.TIME)
+    daily_luck:float = 0
+    player:Player    = field(default_factory=Player)
+    # Which fish are left out of what's catchable: legendary (boss) fish, and Mr. Qi's quest fish and beans
+    ignore_legendary_fish:bool = field(default_factory=lambda: config.IGNORE_LEGENDARY_FISH)
+    ignore_mr_qi:bool          = field(default_factory=lambda: config.IGNORE_MR_QI)
@@ -0,0 +1,105 @@
+"""
+File which holds a Monte Carlo version of the catch selection, for checking the numbers from probs_algorithm
+(and game_object's compositions) on groups too big to brute force.
+Each trial goes through the precedence groups in order, shuffles each group, rolls each fish's chance, and takes the
+first success, the same as the game. If nothing succeeds, the trial ends up as trash.
+Copyright (C) 2024 Romayne (Contact @ https://github.com/MyNameIsRomayne)
+"""
+
+import time
+import numpy as np
+
+# Upper bound on how many (trial, fish) rolls to hold in memory at once
+MAX_CHUNK_ENTRIES = 4_000_000
+# Same, but when there's a time limit, so it gets checked often enough to stop somewhere near it
+TIME_LIMIT_CHUNK_ENTRIES = 250_000
+
+def pick_from_group(successes:np.ndarray, arrivals:np.ndarray, target:int|None, rerolls:int) -> np.ndarray:
+    """
+    Get which fish each trial catches from one precedence group, or -1 for trials where the group gives nothing.
+    successes: boolean array of shape (trials, group size), whether each fish's roll succeeded.
+    arrivals: random array of the same shape. Ordering each row by it is the same as shuffling the group.
+    target: index of the targeted bait fish in the group, if it is in here. Handled the same as get_probs_with_target.
+    """
+    success_arrivals = np.where(successes, arrivals, np.inf)
+    first = np.argmin(success_arrivals, axis=1)
+    picked = np.where(np.isfinite(success_arrivals[np.arange(len(first)), first]), first, -1)
+    if (target == None) or (rerolls <= 0):
+        return picked
+
+    # Order the successful non-target fish by when they came up
+    other_arrivals = success_arrivals.copy()
+    other_arrivals[:, target] = np.inf
+    other_order = np.argsort(other_arrivals, axis=1)
+    other_sorted = np.take_along_axis(other_arrivals, other_order, axis=1)
+    amount_others = other_sorted.shape[1]
+    # The success which gets kept after all the rerolls are used up (if there are that many)
+    if amount_others > rerolls:
+        after_rerolls_time = other_sorted[:, rerolls]
+        after_rerolls = np.where(np.isfinite(after_rerolls_time), other_order[:, rerolls], -1)
+    else:
+        after_rerolls_time = np.full(len(picked), np.inf)
+        after_rerolls = np.full(len(picked), -1)
+    # The first rejected success, if the group runs out before the rerolls do
+    fallback = np.where(np.isfinite(other_sorted[:, 0]), other_order[:, 0], -1) if amount_others else np.full(len(picked), -1)
+    target_kept = successes[:, target] & (arrivals[:, target] < after_rerolls_time)
+    return np.where(target_kept, target, np.where(after_rerolls != -1, after_rerolls, fallback))
+
+def simulate_groups(groups:list[tuple[list[float], int|None]],
+                    trials:int = 1_000_000,
+                    rerolls:int = 2,
+                    seed:int|None = None,
+                    time_limit:float|None = None) -> dict[str, np.ndarray|int]:
+    """
+    Simulate catching from some precedence groups `trials` times.
+    groups: list of (chance of each fish, index of the targeted bait fish or None), from lowest to highest precedence.
+    time_limit: if given, stop early (with fewer trials) once this many seconds have gone by.
+    Returns a dict with:
+    "counts": how many times each fish was caught, in the same order as the groups (flattened), with trash last
+    "trials": how many trials were actually run
+    """
+    rng = np.random.default_rng(seed)
+    group_sizes = [len(chance_list) for chance_list, _ in groups]
+    group_starts = np.concatenate([[0], np.cumsum(group_sizes)]).astype(int)
+    chances = np.concatenate([np.asarray(chance_list, dtype=float) for chance_list, _ in groups]) if len(groups) else np.zeros(0)
+    amount_fish = len(chances)
+    trash = amount_fish
+    counts = np.zeros(amount_fish + 1, dtype=np.int64)
+
+    max_entries = MAX_CHUNK_ENTRIES if (time_limit == None) else TIME_LIMIT_CHUNK_ENTRIES
+    chunk_size = max(1, max_entries // max(1, amount_fish))
+    start_time = time.perf_counter()
+    done = 0
+    while done < trials:
+        amount = min(chunk_size, trials - done)
+        successes = rng.random((amount, amount_fish)) < chances
+        arrivals = rng.random((amount, amount_fish))
+        caught = np.full(amount, trash)
+        undecided = np.ones(amount, dtype=bool)
+        # Go through the groups in order, the first one to give something wins
+        for (_, target), start, stop in zip(groups, group_starts[:-1], group_starts[1:]):
+            if not undecided.any():
+                break
+            picked = pick_from_group(successes[undecided, start:stop], arrivals[undecided, start:stop], target, rerolls)
+            decided_here = np.flatnonzero(undecided)[picked != -1]
+            caught[decided_here] = start + picked[picked != -1]
+            undecided[decided_here] = False
+        counts += np.bincount(caught, minlength=amount_fish + 1)
+        done += amount
+        if (time_limit != None) and (time.perf_counter() - start_time > time_limit):
+            break
+    return {"counts": counts, "trials": done}
+
+def get_confidence_intervals(counts:np.ndarray, trials:int, z:float = 1.96) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Get the frequency of each count out of trials, along with a Wilson score interval around each.
+    z: how many standard deviations wide the interval should be. 1.96 is roughly 95%.
+    Returns (frequencies, lower bounds, upper bounds).
+    """
+    frequencies = counts / max(1, trials)
+    if trials == 0:
+        return frequencies, np.zeros(len(counts)), np.ones(len(counts))
+    denominator = 1 + z**2 / trials
+    center = (frequencies + z**2 / (2 * trials)) / denominator
+    spread = z * np.sqrt(frequencies * (1 - frequencies) / trials + z**2 / (4 * trials**2)) / denominator
+    return frequencies, np.clip(center - spread, 0, 1), np.clip(center + spread, 0, 1)
@@ -0,0 +1,53 @@
+"""
+File which holds handle_simulation_query, for checking the analytic catch chances of locations against a simulation.
+Copyright (C) 2024 Romayne (Contact @ https://github.com/MyNameIsRomayne)
+"""
+
+import stardewfish.utils as utils
+import config
+
+from stardewfish import game_object
+from stardewfish.simulation import simulate_groups, get_confidence_intervals
+game = game_object.game
+
+def formatpct(chance:float) -> str:
+    return f"{round(chance*100, 2)}%".rjust(6, " ")
+
+def handle_simulation_query(locations=[]):
+    """
+    Simulate each location's areas config.SIMULATION_TRIALS times (or for config.SIMULATION_TIME_LIMIT seconds, whichever
+    comes first), and print the results next to the analytic ones, along with how many catches were actually simulated.
+    """
+    use_locations = config.LOCATIONS if (len(locations) == 0) else locations
+    time_limit = config.SIMULATION_TIME_LIMIT if (config.SIMULATION_TIME_LIMIT > 0) else None
+    time_limit_blurb = f", for at most {time_limit} seconds each" if (time_limit != None) else ""
+    print(f"Simulating {config.SIMULATION_TRIALS} catches per area{time_limit_blurb}.\n")
+
+    printable_data:list[list[str]] = []
+    row_len = 4
+    column_char_limit = 24
+
+    for location_name in use_locations:
+        location = game.location_objects[str(location_name).lower().title()]
+        for area in [None] + location.areas:
+            area_groups = location.get_area_precedence_groups(area)
+            if area_groups == None:
+                continue
+            _, groups = area_groups
+            analytic = game_object.build_area_composition(groups, game_object.get_group_weights(groups))["chances"]
+            analytic.append(1 - sum(analytic))
+            simulated = simulate_groups([(chance_list, target) for _, chance_list, target in groups], config.SIMULATION_TRIALS,
+                                        time_limit=time_limit)
+            frequencies, lower, upper = get_confidence_intervals(simulated["counts"], simulated["trials"])
+
+            # Fish go in the same order as the groups, with trash (nothing caught) at the end
+            names = [", ".join([obj.name for obj in fish.itemids]) for group_fish, _, _ in groups for fish in group_fish]
+            names.append("(Nothing)")
+            area_blurb = f" ({area})" if (area != None) else ""
+            printable_data.append([""]*row_len)
+            printable_data.append([f"{location_name}{area_blurb}", "Analytic", f"Simulated ({simulated['trials']})", "95% Interval"])
+            printable_data.append(["-"*column_char_limit]*row_len)
+            for i, name in enumerate(names):
+                printable_data.append([name, formatpct(analytic[i]), formatpct(frequencies[i]), f"{formatpct(lower[i])} - {formatpct(upper[i])}"])
+
+    print(utils.format2DListAsTable(printable_data, char_limit=column_char_limit, column_delimiter="   "))
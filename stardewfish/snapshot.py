@@ -0,0 +1,429 @@
+"""
+File which holds the snapshot format, a single binary file holding every dataset the game data is loaded into.
+It's laid out to be opened with mmap and read lazily -- nothing is unpickled up front, and an object is only put together
+from the file when something actually asks for it.
+
+Layout of the file:
+    magic (8 bytes), format version (uint32), header length (uint32), header CRC32 (uint32), header (JSON),
+    then each section, aligned to 8 bytes.
+The header holds, for every section (dataset), where it is in the file, a CRC32 of its bytes, and a descriptor of its tables
+and string table. A section is self-contained (all offsets in it are from its own start), so it can be copied between
+files as raw bytes. The checksums mean a damaged section can be found (and rebuilt) on its own, without throwing out the rest.
+
+Each table in a section is one column per attribute of the objects stored in it, where each column is one of:
+    "i" int64, "f" float64, "b" bool (int8), "s" string (uint32 index into the string table),
+    "p" anything else (uint32 index into the string table, of that value pickled on its own),
+    "r" a list of objects, stored as (start, stop) rows of another (child) table in the section,
+    "n" no value at all (every row is None or missing).
+Any column which isn't just plain values also gets a state column (uint8) saying, per row, whether the value is there,
+None, missing entirely (the object never had that attribute), or an int stored in a float column.
+Copyright (C) 2024 Romayne (Contact @ https://github.com/MyNameIsRomayne)
+"""
+
+from collections.abc import Mapping
+import json
+import mmap
+import os
+import pickle
+import struct
+import threading
+import zlib
+import numpy as np
+
+SNAPSHOT_MAGIC   = b"SDVFSNAP"
+SNAPSHOT_VERSION = 2
+HEADER_FORMAT    = "<8sIII"
+
+# State column values
+STATE_PRESENT = 0
+STATE_NONE    = 1
+STATE_MISSING = 2
+STATE_INT     = 3
+
+# Numpy types for each column kind that has data
+COLUMN_DTYPES = {
+    "i": np.int64,
+    "f": np.float64,
+    "b": np.int8,
+    "s": np.uint32,
+    "p": np.uint32,
+    "r": np.int64,
+}
+
+INT64_MIN, INT64_MAX = -(1 << 63), (1 << 63) - 1
+
+# Stand-in for an attribute an object doesn't have at all
+_MISSING = object()
+
+def align(offset:int, alignment:int = 8) -> int:
+    """Round offset up to the next multiple of alignment."""
+    return (offset + alignment - 1) // alignment * alignment
+
+def get_column_kind(values:list, classes:dict[str, type]) -> str:
+    """Work out which kind of column (see the file docstring) fits every value in values."""
+    present = [value for value in values if (value is not _MISSING) and (value is not None)]
+    if not len(present):
+        return "n"
+    types = {type(value) for value in present}
+    if types == {bool}:
+        return "b"
+    if types <= {int, float} and all(INT64_MIN <= value <= INT64_MAX for value in present if type(value) == int):
+        return "i" if (types == {int}) else "f"
+    if types == {str}:
+        return "s"
+    if types == {list}:
+        element_types = {type(element) for value in present for element in value}
+        if (len(element_types) == 1) and (next(iter(element_types)).__name__ in classes):
+            return "r"
+    return "p"
+
+class SectionWriter():
+    """Builds up the bytes and descriptor of one section."""
+
+    def __init__(self, classes:dict[str, type]):
+        self.classes = classes
+        self.buffer = bytearray()
+        self.strings:list[bytes] = []
+        self.string_indexes:dict[bytes, int] = {}
+        self.tables:dict[str, dict] = {}
+
+    def add_array(self, array:np.ndarray) -> int:
+        """Append an array to the section, returning where it starts."""
+        self.buffer += bytes(align(len(self.buffer)) - len(self.buffer))
+        offset = len(self.buffer)
+        self.buffer += np.ascontiguousarray(array).tobytes()
+        return offset
+
+    def add_string(self, value:bytes) -> int:
+        """Add some bytes to the string table (once, no matter how often they're added). Returns the index of them."""
+        index = self.string_indexes.get(value)
+        if index == None:
+            index = len(self.strings)
+            self.strings.append(value)
+            self.string_indexes[value] = index
+        return index
+
+    def add_table(self, name:str, rows:list) -> None:
+        """Add a table to the section, made up of the attributes of each object in rows."""
+        # Keep attributes in the order they're first seen, which is the same order __init__ set them in
+        attribute_names:dict[str, None] = {}
+        for row in rows:
+            for attribute in vars(row):
+                attribute_names[attribute] = None
+        class_names = {type(row).__name__ for row in rows}
+        if len(class_names) > 1:
+            raise TypeError(f"Table {name} mixes classes {class_names}")
+
+        columns = []
+        for attribute in attribute_names:
+            values = [vars(row).get(attribute, _MISSING) for row in rows]
+            columns.append(self.add_column(f"{name}.{attribute}", attribute, values))
+        self.tables[name] = {
+            "class"   : class_names.pop() if len(class_names) else None,
+            "rows"    : len(rows),
+            "columns" : columns,
+        }
+
+    def add_column(self, table_name:str, attribute:str, values:list) -> dict:
+        """Add one column to the section, returning its descriptor."""
+        kind = get_column_kind(values, self.classes)
+        states = np.zeros(len(values), dtype=np.uint8)
+        for row, value in enumerate(values):
+            if value is _MISSING:
+                states[row] = STATE_MISSING
+            elif value is None:
+                states[row] = STATE_NONE
+            elif (kind == "f") and (type(value) == int):
+                states[row] = STATE_INT
+        column = {"name": attribute, "kind": kind, "data": None, "state": None}
+        if states.any():
+            column["state"] = self.add_array(states)
+
+        present = states != STATE_MISSING
+        present &= states != STATE_NONE
+        if kind in ["i", "f", "b"]:
+            data = np.zeros(len(values), dtype=COLUMN_DTYPES[kind])
+            data[present] = [values[row] for row in np.flatnonzero(present)]
+            column["data"] = self.add_array(data)
+        elif kind in ["s", "p"]:
+            data = np.zeros(len(values), dtype=COLUMN_DTYPES[kind])
+            for row in np.flatnonzero(present):
+                value = values[row]
+                data[row] = self.add_string(value.encode("utf-8") if (kind == "s") else pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+            column["data"] = self.add_array(data)
+        elif kind == "r":
+            # Every list gets flattened into one child table, each row here just says which part of it is theirs
+            child_rows = []
+            data = np.zeros((len(values), 2), dtype=COLUMN_DTYPES[kind])
+            for row in np.flatnonzero(present):
+                data[row] = [len(child_rows), len(child_rows) + len(values[row])]
+                child_rows += values[row]
+            self.add_table(table_name, child_rows)
+            column["data"] = self.add_array(data)
+            column["child"] = table_name
+        return column
+
+    def finish(self) -> tuple[bytes, dict]:
+        """Append the string table, and get the finished bytes and descriptor of the section."""
+        offsets = np.zeros(len(self.strings) + 1, dtype=np.uint64)
+        offsets[1:] = np.cumsum([len(value) for value in self.strings])
+        strings = {
+            "count"   : len(self.strings),
+            "offsets" : self.add_array(offsets),
+        }
+        strings["data"] = len(self.buffer)
+        self.buffer += b"".join(self.strings)
+        self.buffer += bytes(align(len(self.buffer)) - len(self.buffer))
+        return bytes(self.buffer), {"tables": self.tables, "strings": strings}
+
+def encode_section(objects:dict[str], classes:dict[str, type]) -> tuple[bytes, dict]:
+    """
+    Encode a dataset (a dict of objects keyed by ID, as GameObject holds them) as the bytes of one section.
+    classes: every class which may show up in the dataset (including inside lists), keyed by name.
+    Returns the section's bytes and its descriptor.
+    """
+    writer = SectionWriter(classes)
+    writer.add_table("root", list(objects.values()))
+    writer.tables["root"]["keys"] = writer.add_column("root.keys", "keys", list(objects.keys()))
+    return writer.finish()
+
+def write_snapshot(file_path:str, sections:dict[str, tuple[bytes, dict]], extra:dict[str, dict] = {}) -> None:
+    """
+    Write out a snapshot file from already encoded sections.
+    sections: (bytes, descriptor) of each section, keyed by section name.
+    extra: anything else to store in the header for each section (e.g. fingerprints), keyed by section name.
+    """
+    header_sections = {}
+    offset = 0
+    for name, (section_bytes, descriptor) in sections.items():
+        header_sections[name] = dict(extra.get(name, {}))
+        header_sections[name].update({
+            "offset"     : offset,
+            "length"     : len(section_bytes),
+            "checksum"   : zlib.crc32(section_bytes),
+            "descriptor" : descriptor,
+        })
+        offset = align(offset + len(section_bytes))
+    header = json.dumps({"sections": header_sections}).encode("utf-8")
+
+    # Written to a temp file next to the real one, flushed to disk, then moved over it in one step. That way an interrupted
+    # write never leaves a half-written snapshot behind, and anything still mapping the old file doesn't have it truncated
+    # and rewritten underneath it
+    temp_path = f"{file_path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, "wb") as file:
+            file.write(struct.pack(HEADER_FORMAT, SNAPSHOT_MAGIC, SNAPSHOT_VERSION, len(header), zlib.crc32(header)))
+            file.write(header)
+            file.write(bytes(align(file.tell()) - file.tell()))
+            data_start = file.tell()
+            for name, (section_bytes, _) in sections.items():
+                file.write(bytes(data_start + header_sections[name]["offset"] - file.tell()))
+                file.write(section_bytes)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, str(file_path))
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+class Snapshot():
+    """An open snapshot file. Only the header is read when opening, everything else is read as it's needed."""
+
+    def __init__(self, file_path:str):
+        self.file_path = str(file_path)
+        self.file = open(self.file_path, "rb")
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        # Every reader made from this, so their views into the map can be let go of on close
+        self.readers:list[SectionReader] = []
+        # Sections which have had their checksum checked, and whether they were intact
+        self.checked:dict[str, bool] = {}
+        try:
+            magic, version, header_length, header_checksum = struct.unpack_from(HEADER_FORMAT, self.map, 0)
+            if (magic != SNAPSHOT_MAGIC) or (version != SNAPSHOT_VERSION):
+                raise ValueError(f"{self.file_path} is not a version {SNAPSHOT_VERSION} snapshot")
+            header_start = struct.calcsize(HEADER_FORMAT)
+            header = bytes(self.map[header_start:header_start + header_length])
+            if (len(header) != header_length) or (zlib.crc32(header) != header_checksum):
+                raise ValueError(f"{self.file_path} has a damaged header")
+            self.header:dict = json.loads(header)
+        except Exception:
+            self.close()
+            raise
+        self.sections:dict[str, dict] = self.header["sections"]
+        self.data_start = align(header_start + header_length)
+
+    @staticmethod
+    def try_open(file_path:str) -> "Snapshot|None":
+        """Open the snapshot at file_path, or get None if it is missing or isn't a usable snapshot."""
+        if (not os.path.exists(str(file_path))) or (os.path.getsize(str(file_path)) == 0):
+            return None
+        try:
+            return Snapshot(file_path)
+        except (ValueError, struct.error, UnicodeDecodeError):
+            return None
+
+    def check_section(self, name:str) -> bool:
+        """
+        Whether a section is all there and its bytes still match the checksum it was written with.
+        Only worked out the first time it's asked for each section (CRC32 is quick, but no need to do it twice).
+        """
+        if name not in self.checked:
+            section = self.sections[name]
+            start = self.data_start + section["offset"]
+            end = start + section["length"]
+            intact = False
+            if end <= len(self.map):
+                with memoryview(self.map) as view, view[start:end] as section_view:
+                    intact = zlib.crc32(section_view) == section["checksum"]
+            self.checked[name] = intact
+        return self.checked[name]
+
+    def close(self) -> None:
+        """Close the map and file. Anything already read from it stays usable, but tables can't read any more."""
+        for reader in self.readers:
+            reader.arrays.clear()
+        self.map.close()
+        self.file.close()
+
+    def get_section_bytes(self, name:str) -> bytes:
+        """Get the raw bytes of a section, e.g. to copy it into a new snapshot."""
+        section = self.sections[name]
+        start = self.data_start + section["offset"]
+        return bytes(self.map[start:start + section["length"]])
+
+    def get_table(self, name:str, classes:dict[str, type], on_load = None) -> "SnapshotTable":
+        """
+        Get a section as a read-only dict-like table keyed by ID. See SnapshotTable.
+        classes: the classes objects in the section are made from, keyed by name.
+        on_load: optional function called with each object right after it's read.
+        """
+        reader = SectionReader(self, name, classes)
+        self.readers.append(reader)
+        return SnapshotTable(reader, on_load)
+
+class SectionReader():
+    """Reads objects out of one section of a snapshot, one row at a time."""
+
+    def __init__(self, snapshot:Snapshot, name:str, classes:dict[str, type]):
+        self.snapshot = snapshot
+        self.classes = classes
+        self.start = snapshot.data_start + snapshot.sections[name]["offset"]
+        self.descriptor = snapshot.sections[name]["descriptor"]
+        self.tables = self.descriptor["tables"]
+        # Arrays are only made (as views into the map, no copying) once something reads from them
+        self.arrays:dict[tuple[int, str], np.ndarray] = {}
+
+    def get_array(self, offset:int, kind:str, rows:int) -> np.ndarray:
+        key = (offset, kind)
+        if key not in self.arrays:
+            dtype = np.uint8 if (kind == "state") else COLUMN_DTYPES[kind]
+            count = rows * 2 if (kind == "r") else rows
+            array = np.frombuffer(self.snapshot.map, dtype=dtype, count=count, offset=self.start + offset)
+            self.arrays[key] = array.reshape(rows, 2) if (kind == "r") else array
+        return self.arrays[key]
+
+    def get_string(self, index:int) -> bytes:
+        """Get entry index of the string table, as bytes."""
+        strings = self.descriptor["strings"]
+        key = (strings["offsets"], "offsets")
+        if key not in self.arrays:
+            self.arrays[key] = np.frombuffer(self.snapshot.map, dtype=np.uint64, count=strings["count"] + 1, offset=self.start + strings["offsets"])
+        offsets = self.arrays[key]
+        start = self.start + strings["data"]
+        return self.snapshot.map[start + int(offsets[index]):start + int(offsets[index + 1])]
+
+    def get_value(self, column:dict, rows:int, row:int):
+        """Read the value of one column at one row. Returns _MISSING if the object didn't have it."""
+        if column["state"] != None:
+            state = self.get_array(column["state"], "state", rows)[row]
+            if state == STATE_MISSING:
+                return _MISSING
+            if state == STATE_NONE:
+                return None
+        else:
+            state = STATE_PRESENT
+        kind = column["kind"]
+        if kind == "n":
+            return None
+        value = self.get_array(column["data"], kind, rows)[row]
+        if kind == "i":
+            return int(value)
+        if kind == "f":
+            return int(value) if (state == STATE_INT) else float(value)
+        if kind == "b":
+            return bool(value)
+        if kind == "s":
+            return self.get_string(int(value)).decode("utf-8")
+        if kind == "p":
+            return pickle.loads(self.get_string(int(value)))
+        if kind == "r":
+            return [self.get_object(column["child"], child_row) for child_row in range(int(value[0]), int(value[1]))]
+        raise ValueError(f"Unknown column kind {kind}")
+
+    def get_object(self, table_name:str, row:int):
+        """Put together the object stored at row of some table."""
+        table = self.tables[table_name]
+        class_type = self.classes[table["class"]]
+        new_object = class_type.__new__(class_type)
+        attributes = vars(new_object)
+        for column in table["columns"]:
+            value = self.get_value(column, table["rows"], row)
+            if value is not _MISSING:
+                attributes[column["name"]] = value
+        return new_object
+
+    def get_keys(self) -> list[str]:
+        """Get the key (ID) of every row of the section, in order."""
+        root = self.tables["root"]
+        return [self.get_value(root["keys"], root["rows"], row) for row in range(root["rows"])]
+
+class SnapshotTable(Mapping):
+    """
+    A read-only, dict-like view of one dataset in a snapshot, keyed by ID.
+    Objects are only read out of the snapshot the first time they're asked for, and then kept, so the same ID
+    always gives back the same object.
+    """
+
+    def __init__(self, reader:SectionReader, on_load = None):
+        self.reader = reader
+        self.on_load = on_load
+        self.indexes:dict[str, int]|None = None
+        self.loaded:dict[int, object] = {}
+        # Objects whose on_load is done, which other threads can be handed without waiting on the lock
+        self.ready:dict[int, object] = {}
+        # Held while reading an object out, so two threads asking for the same one can't each make their own.
+        # Reentrant since on_load can read other objects, which may be in this table too
+        self.lock = threading.RLock()
+
+    def get_indexes(self) -> dict[str, int]:
+        if self.indexes == None:
+            with self.lock:
+                if self.indexes == None:
+                    self.indexes = {key: row for row, key in enumerate(self.reader.get_keys())}
+        return self.indexes
+
+    def __getitem__(self, key:str):
+        row = self.get_indexes()[key]
+        if row in self.ready:
+            return self.ready[row]
+        with self.lock:
+            if row not in self.loaded:
+                loaded_object = self.reader.get_object("root", row)
+                self.loaded[row] = loaded_object
+                if self.on_load != None:
+                    self.on_load(loaded_object)
+                self.ready[row] = loaded_object
+            return self.loaded[row]
+
+    def __contains__(self, key) -> bool:
+        return key in self.get_indexes()
+
+    def keys(self):
+        # The index's own keys, so "in table.keys()" is a plain dict lookup
+        return self.get_indexes().keys()
+
+    def __iter__(self):
+        return iter(self.get_indexes())
+
+    def __len__(self) -> int:
+        return len(self.get_indexes())
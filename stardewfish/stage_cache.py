@@ -0,0 +1,88 @@
+"""
+File which holds the StageCache class, for keeping the results of each stage of working out an area's composition
+(which fish are catchable, their chances and precedence groups, the weights of those, fish values/XP) keyed by only
+the inputs each stage depends on. Changing part of the scenario then only redoes the stages which depend on that part.
+Copyright (C) 2024 Romayne (Contact @ https://github.com/MyNameIsRomayne)
+"""
+
+import dataclasses
+import threading
+from collections import OrderedDict
+from operator import attrgetter
+from typing import Callable
+
+from stardewfish.scenario import Scenario
+
+# The scenario (or player) values each stage depends on. Anything not listed can change without redoing the stage.
+# Stages after "catchable" also depend on which fish came out of it rather than the time/weather/season themselves,
+# so a time change which leaves the catchable fish the same doesn't redo anything after it.
+STAGE_INPUTS = {
+    # Which fish can be caught (fish_satisfies_subdata and filter_catchable_fish). Bait is here for magic bait.
+    # The time is left out, since the key uses the time window it falls in instead (see GameObject.get_catchable_inputs)
+    "catchable"   : ["season", "weather", "bait", "ignore_legendary_fish", "ignore_mr_qi"],
+    # The chance of each catchable fish, so also the precedence groups and their weights
+    "chances"     : ["fishing_level", "fishing_depth", "fishing_rod", "lure", "bait", "bait_target_id", "daily_luck"],
+    # The size ranges and quality of each fish, so also their values and XP (both the fish table and each CatchableData)
+    "stats"       : ["fishing_level", "fishing_depth", "pct_perfect", "scale_perfect_by_difficulty"],
+}
+
+# Gets the inputs of each stage out of a scenario all in one go
+SCENARIO_FIELDS = [field.name for field in dataclasses.fields(Scenario)]
+INPUT_GETTERS = {stage: attrgetter(*[name if (name in SCENARIO_FIELDS) else f"player.{name}" for name in names])
+                 for stage, names in STAGE_INPUTS.items()}
+
+class StageCache():
+    """
+    Results of each composition stage, kept per stage and keyed by whatever that stage depends on (see get_inputs).
+    Each stage holds up to max_entries results, dropping its least recently used ones past that (like ProbsCache), so a
+    sweep over more scenarios than fit only redoes the oldest rather than all of them.
+    Safe to share between threads. Two threads missing the same key at once both work it out, and the last one is kept.
+    """
+
+    def __init__(self, max_entries:int):
+        self.max_entries = max_entries
+        self.entries:dict[str, OrderedDict[tuple]] = {}
+        # How many times each stage has actually been worked out, rather than taken from here
+        self.computed:dict[str, int] = {}
+        self.lock = threading.Lock()
+
+    def get_inputs(self, stage:str, scenario:Scenario) -> tuple:
+        """Get the values from a scenario which the results of a stage depend on."""
+        return INPUT_GETTERS[stage](scenario)
+
+    def has(self, stage:str, key:tuple) -> bool:
+        with self.lock:
+            return key in self.entries.get(stage, {})
+
+    def put(self, stage:str, key:tuple, value):
+        """Keep the result of a stage, which was worked out elsewhere."""
+        with self.lock:
+            entries = self.entries.setdefault(stage, OrderedDict())
+            entries[key] = value
+            entries.move_to_end(key)
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+            self.computed[stage] = self.computed.get(stage, 0) + 1
+        return value
+
+    def get(self, stage:str, key:tuple, compute:Callable):
+        """Get the result of a stage for key, using compute() to work it out if it isn't kept already."""
+        # A missing key is worked out without holding the lock, since compute() gets other stages out of here too
+        with self.lock:
+            entries = self.entries.get(stage, {})
+            if key in entries:
+                entries.move_to_end(key)
+                return entries[key]
+        return self.put(stage, key, compute())
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.computed.clear()
+
+def get_fish_key(fish_locs:list) -> tuple:
+    """
+    Key for the result of the catchable stage, which the stages after it depend on. FishLocations are never remade once
+    loaded, so which ones they are is enough.
+    """
+    return tuple([id(fish_loc) for fish_loc in fish_locs])
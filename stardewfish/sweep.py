@@ -0,0 +1,155 @@
+"""
+File which holds sweep, for getting the compositions of many locations over every combination of some scenario axes
+(season, weather, time, depth, fishing level, rod, bait, lure) at once, as numpy arrays.
+Copyright (C) 2024 Romayne (Contact @ https://github.com/MyNameIsRomayne)
+"""
+
+import dataclasses
+import itertools
+import numpy as np
+
+import constants
+from stardewfish import game_object
+from stardewfish.game_object import GameLocation, FishLocation
+from stardewfish.player_object import Player
+from stardewfish.scenario import Scenario
+from stardewfish.time_index import DAY_START, DAY_END
+game = game_object.game
+
+# Axes which change the scenario itself, and axes which change its player (and the Player attribute they change)
+SCENARIO_AXES = ["season", "weather", "time"]
+PLAYER_AXES = {
+    "depth" : "fishing_depth",
+    "level" : "fishing_level",
+    "rod"   : "fishing_rod",
+    "bait"  : "bait",
+    "lure"  : "lure",
+}
+
+# Every value each axis can take, for axes where that's a short list
+AXIS_ALL_VALUES = {
+    "season"  : [constants.SEASON_SPRING, constants.SEASON_SUMMER, constants.SEASON_FALL, constants.SEASON_WINTER],
+    "weather" : [constants.WEATHER_SUNNY, constants.WEATHER_RAIN, constants.WEATHER_GREEN_RAIN],
+    "depth"   : [0, 1, 2, 3, 4, 5],
+    "level"   : list(range(0, 11)),
+    "rod"     : [constants.FISHING_ROD_TRAINING, constants.FISHING_ROD_BAMBOO, constants.FISHING_ROD_FIBERGLASS, constants.FISHING_ROD_IRIDIUM],
+    "bait"    : [constants.FISHING_BAIT_NONE, constants.FISHING_BAIT_TARGETED, constants.FISHING_BAIT_MAGIC],
+    "lure"    : [constants.FISHING_LURE_NONE, constants.FISHING_LURE_CURIOSITY],
+}
+
+# How many scenarios have their precedence groups weighed together in one batch
+SCENARIOS_PER_BATCH = 256
+
+def get_time_slots(start:int = DAY_START, end:int = DAY_END, step_minutes:int = 10) -> list[int]:
+    """Get every time (in military time, like 1350) from start up to but not including end, step_minutes apart."""
+    slots:list[int] = []
+    minutes, end_minutes = (start // 100) * 60 + (start % 100), (end // 100) * 60 + (end % 100)
+    while minutes < end_minutes:
+        slots.append((minutes // 60) * 100 + (minutes % 60))
+        minutes += step_minutes
+    return slots
+
+def get_fish_label(fish:FishLocation) -> str:
+    """Get the name a fish spawn goes by in the sweep results (its item IDs, since some spawns are a pick of a few)."""
+    return "|".join([obj.id for obj in fish.itemids])
+
+def get_sweep_scenarios(axes:dict[str, list], base:Scenario) -> list[Scenario]:
+    """
+    Get the scenario of every combination of axis values, in the same order as the flattened sweep results.
+    Scenarios with the same player values share the same Player, so per-player work can be done once for all of them.
+    """
+    for axis in axes:
+        if (axis not in SCENARIO_AXES) and (axis not in PLAYER_AXES):
+            raise ValueError(f"Unknown sweep axis {axis}")
+    players:dict[tuple, Player] = {}
+    scenarios:list[Scenario] = []
+    for combination in itertools.product(*axes.values()):
+        values = dict(zip(axes.keys(), combination))
+        player_values = {PLAYER_AXES[axis]: value for axis, value in values.items() if axis in PLAYER_AXES}
+        player_key = tuple(player_values.items())
+        if player_key not in players:
+            players[player_key] = dataclasses.replace(base.player, **player_values)
+        scenario_values = {axis: value for axis, value in values.items() if axis in SCENARIO_AXES}
+        scenarios.append(dataclasses.replace(base, player=players[player_key], **scenario_values))
+    return scenarios
+
+def sweep(locations:list[GameLocation], axes:dict[str, list], base:Scenario = None) -> dict:
+    """
+    Get the composition of every area of every location in locations, for every combination of values in axes.
+    axes: the values to use for each axis, keyed by axis name (see SCENARIO_AXES and PLAYER_AXES). The results have one
+          dimension per axis, in the order given. Anything not swept over comes from base.
+    base: the scenario to start from. Defaults to the scenario of the GameObject the locations were loaded by
+    Returns a dict of:
+        "axes": the axes and their values, as passed in.
+        "areas": (location ID, area ID or None) of each area.
+        "fish": the label (see get_fish_label) of each fish spawn.
+        "coins", "xp": expected coins/XP of one catch, shaped (*axis lengths, areas).
+        "probabilities": chance of each fish being the catch, shaped (*axis lengths, areas, fish).
+    """
+    base = game_object.get_scenario(base, game_object.get_locations_game(locations))
+    scenarios = get_sweep_scenarios(axes, base)
+    shape = [len(values) for values in axes.values()]
+    areas = [(location, area) for location in locations for area in [None] + location.areas]
+
+    coins = np.zeros((len(scenarios), len(areas)))
+    xp = np.zeros((len(scenarios), len(areas)))
+    fish_columns:dict[str, int] = {}
+    # (scenario, area, fish column, chance) of every nonzero probability, put into the dense array at the end
+    probability_entries:list[tuple[int, int, int, float]] = []
+
+    for batch_start in range(0, len(scenarios), SCENARIOS_PER_BATCH):
+        batch = list(enumerate(scenarios[batch_start:batch_start + SCENARIOS_PER_BATCH], batch_start))
+        # Every area of every scenario in the batch which hasn't been weighed yet (in this sweep or before) is weighed in one go
+        batch_areas = [(scenario_index, area_index) for scenario_index, _ in batch for area_index in range(len(areas))]
+        area_keys = game_object.weigh_areas([(*areas[area_index], scenarios[scenario_index]) for scenario_index, area_index in batch_areas])
+        prepared = [(scenario_index, scenarios[scenario_index], area_index, area_key)
+                    for (scenario_index, area_index), area_key in zip(batch_areas, area_keys) if area_key != None]
+
+        for scenario_index, scenario, area_index, area_key in prepared:
+            location, area = areas[area_index]
+            composition = location.get_area_composition_from_key(area, area_key, scenario)
+            chances = np.array(composition["chances"])
+            coins[scenario_index, area_index] = np.dot(chances, composition["coins"])
+            xp[scenario_index, area_index] = np.dot(chances, composition["xp"])
+            for fish, chance in zip(composition["fish"], composition["chances"]):
+                column = fish_columns.setdefault(get_fish_label(fish), len(fish_columns))
+                probability_entries.append((scenario_index, area_index, column, chance))
+
+    probabilities = np.zeros((len(scenarios), len(areas), len(fish_columns)))
+    if len(probability_entries):
+        scenario_indexes, area_indexes, columns, chances = zip(*probability_entries)
+        # The same fish can spawn more than once in an area, those add together
+        np.add.at(probabilities, (list(scenario_indexes), list(area_indexes), list(columns)), list(chances))
+
+    return {
+        "axes"          : axes,
+        "areas"         : [(location.id, area) for location, area in areas],
+        "fish"          : list(fish_columns.keys()),
+        "coins"         : coins.reshape(shape + [len(areas)]),
+        "xp"            : xp.reshape(shape + [len(areas)]),
+        "probabilities" : probabilities.reshape(shape + [len(areas), len(fish_columns)]),
+    }
+
+def get_day_profile(locations:list[GameLocation], scenario:Scenario = None, step_minutes:int = 10) -> dict:
+    """
+    Get the compositions (see get_compositions) of locations every step_minutes through the day, in a scenario
+    (default the one of the GameObject they were loaded by) besides the time. They're only worked out at the change points of the time index, and every
+    other time shares the compositions of the change point before it, since it has the same fish.
+    Returns a dict of:
+        "times": every time in the profile.
+        "change_points": the start of each time window, the times the compositions were actually worked out for.
+        "windows": the change point each time in times falls under.
+        "compositions": the compositions of each change point, keyed by it.
+    """
+    game_data = game_object.get_locations_game(locations)
+    scenario = game_object.get_scenario(scenario, game_data)
+    time_index = game_data.get_time_index()
+    compositions = {point: game_object.get_compositions(locations, dataclasses.replace(scenario, time=point))
+                    for point in time_index.change_points}
+    times = get_time_slots(step_minutes=step_minutes)
+    return {
+        "times"         : times,
+        "change_points" : time_index.change_points,
+        "windows"       : [time_index.get_window_start(time) for time in times],
+        "compositions"  : compositions,
+    }
@@ -0,0 +1,73 @@
+"""
+File which holds handle_sweep_query, for sweeping locations over scenario axes and printing (or saving) the results.
+Copyright (C) 2024 Romayne (Contact @ https://github.com/MyNameIsRomayne)
+"""
+
+import numpy as np
+
+import stardewfish.utils as utils
+import config
+
+from stardewfish import game_object
+from stardewfish.sweep import sweep, get_time_slots, SCENARIO_AXES, PLAYER_AXES, AXIS_ALL_VALUES
+game = game_object.game
+
+# Axes whose values are numbers rather than names
+INT_AXES = ["time", "depth", "level"]
+
+def parse_axis_values(axis:str, raw_values:str) -> list:
+    """Get the values of an axis from how it was written on the command line, like 'rain,sunny' or 'all'."""
+    if raw_values == "all":
+        return get_time_slots() if (axis == "time") else AXIS_ALL_VALUES[axis]
+    values = [value for value in raw_values.split(",") if value != ""]
+    if axis in INT_AXES:
+        values = [int(value) for value in values]
+    return values
+
+def handle_sweep_query(args:list[str]):
+    """
+    Sweep the locations in args (or config.LOCATIONS, if there aren't any) over the axes in args, and print how each
+    area does. Axes are written like time=all or weather=sunny,rain, and out=file.npz saves the raw arrays.
+    """
+    axes:dict[str, list] = {}
+    locations:list[str] = []
+    out_path = None
+    for arg in args:
+        if "=" not in arg:
+            locations.append(str(arg).lower().title())
+            continue
+        key, raw_values = arg.split("=", 1)
+        if key == "out":
+            out_path = raw_values
+        elif (key in SCENARIO_AXES) or (key in PLAYER_AXES):
+            axes[key] = parse_axis_values(key, raw_values)
+        else:
+            print(f"Sweep axis {key} not recognized. Valid axes: {', '.join(SCENARIO_AXES + list(PLAYER_AXES.keys()))}")
+            return
+
+    use_locations = config.LOCATIONS if (len(locations) == 0) else locations
+    results = sweep([game.location_objects[str(name).lower().title()] for name in use_locations], axes)
+    axis_names = list(axes.keys())
+    scenario_count = int(np.prod([len(values) for values in axes.values()]))
+    print(f"Swept {len(results['areas'])} areas over {scenario_count} scenarios.\n")
+
+    coins:np.ndarray = results["coins"].reshape(scenario_count, -1)
+    xp:np.ndarray = results["xp"].reshape(scenario_count, -1)
+    printable_data:list[list[str]] = [["Area", "Mean Coins", "Max Coins", "Mean XP", "Max XP", "Best Scenario"]]
+    for area_index, (location_id, area) in enumerate(results["areas"]):
+        best = int(np.argmax(coins[:, area_index]))
+        best_values = np.unravel_index(best, [len(values) for values in axes.values()]) if len(axes) else []
+        best_blurb = ", ".join([f"{name}={axes[name][value]}" for name, value in zip(axis_names, best_values)])
+        area_blurb = f" ({area})" if (area != None) else ""
+        printable_data.append([f"{location_id}{area_blurb}",
+                               str(round(float(coins[:, area_index].mean()), 2)), str(round(float(coins[:, area_index].max()), 2)),
+                               str(round(float(xp[:, area_index].mean()), 2)), str(round(float(xp[:, area_index].max()), 2)),
+                               best_blurb])
+    print(utils.format2DListAsTable(printable_data, char_limit=64, column_delimiter="   "))
+
+    if out_path != None:
+        np.savez(out_path, coins=results["coins"], xp=results["xp"], probabilities=results["probabilities"],
+                 areas=np.array([f"{location_id}:{area}" for location_id, area in results["areas"]]),
+                 fish=np.array(results["fish"]),
+                 **{f"axis_{name}": np.array(values) for name, values in axes.items()})
+        print(f"\nSaved sweep arrays to {out_path}")
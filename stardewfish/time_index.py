@@ -0,0 +1,49 @@
+"""
+File which holds the TimeIndex class, every fish's catch time windows split up into the points of the day where which
+fish are catchable changes. Between two of those points, every time has the same fish (so the same compositions).
+Copyright (C) 2024 Romayne (Contact @ https://github.com/MyNameIsRomayne)
+"""
+
+from bisect import bisect_right
+from collections.abc import Mapping
+
+# The part of the day the player can fish in, 6:00AM until 2:00AM
+DAY_START = 600
+DAY_END   = 2600
+
+class TimeIndex():
+    """
+    The start and end of every catch time window of every (non-trap) fish, sorted, along with which fish can be caught
+    from each of those until the next one. Times before the first window start get None as their window.
+    """
+
+    def __init__(self, fish_objects:Mapping):
+        fish_list = [fish_objects[key] for key in fish_objects]
+        windows:dict[str, list[tuple[int, int]]] = {fish.id: fish.get_catch_windows() for fish in fish_list if not fish.is_trap()}
+        points = {DAY_START}
+        for fish_windows in windows.values():
+            for start, end in fish_windows:
+                points.update([start, end])
+        # Every time a window starts or ends, plus the start of the day
+        self.points:list[int] = sorted(points)
+        # The fish catchable from each point until the next
+        self.catchable:dict[int|None, frozenset[str]] = {None: frozenset()}
+        for point in self.points:
+            self.catchable[point] = frozenset([fish_id for fish_id, fish_windows in windows.items()
+                                               if any(start <= point < end for start, end in fish_windows)])
+        # The points during the day where the catchable fish can change
+        self.change_points:list[int] = [point for point in self.points if DAY_START <= point < DAY_END]
+
+    def get_window_start(self, time:int) -> int|None:
+        """Get the point at or before time, which time has the same catchable fish as. None if it's before every window."""
+        index = bisect_right(self.points, time) - 1
+        return self.points[index] if (index >= 0) else None
+
+    def get_window_end(self, window:int|None) -> int:
+        """Get when the window starting at a point (see get_window_start) ends, which is the next point or the end of the day."""
+        index = bisect_right(self.points, window) if (window != None) else 0
+        return min(self.points[index], DAY_END) if (index < len(self.points)) else DAY_END
+
+    def is_catchable_at(self, fish_id:str, time:int) -> bool:
+        """Whether time falls in one of the catch time windows of a fish."""
+        return fish_id in self.catchable[self.get_window_start(time)]
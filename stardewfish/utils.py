@@ -73,6 +73,84 @@ def read_file_json(file_path:str|Path) -> dict:
     except TypeError:
         return {}
 
+def iter_file_json_records(file_path:str|Path, fields:list[str]|None = None, chunk_size:int = 1 << 20):
+    """
+    Go through the entries of a file holding one big JSON object, one at a time, without reading the whole thing in at once.
+    Only the entry being parsed (and a chunk of the file) is held in memory, rather than the full document.
+    Yields (key, value) for every entry. If the file does not exist, yields nothing.
+    file_path: Some string-convertible path to the file.
+    fields: if given, any value which is a dict only keeps these keys (the ones the caller actually reads). Default None (keep all)
+    chunk_size: how many characters to read from the file at a time. Default about a million
+    """
+    if not ensure_file_exists(file_path):
+        return
+    decoder = json.JSONDecoder()
+    whitespace = " \t\n\r"
+    number_characters = "0123456789+-.eE"
+    with open(str(file_path), "r") as file:
+        buffer = file.read(chunk_size)
+        position = 0
+        at_end = len(buffer) == 0
+
+        def read_more(amount:int) -> bool:
+            """Drop everything already parsed and read more of the file in. Returns False if the file is done."""
+            nonlocal buffer, position, at_end
+            if at_end: return False
+            new_data = file.read(amount)
+            buffer = buffer[position:] + new_data
+            position = 0
+            at_end = len(new_data) == 0
+            return not at_end
+
+        def next_token() -> str:
+            """Skip whitespace and return the next character without consuming it ("" at the end of the file)."""
+            nonlocal position
+            while True:
+                while (position < len(buffer)) and (buffer[position] in whitespace):
+                    position += 1
+                if position < len(buffer): return buffer[position]
+                if not read_more(chunk_size): return ""
+
+        def decode_next():
+            """Decode the JSON value starting at position, reading more of the file until it's all there."""
+            nonlocal position
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buffer, position)
+                    # A number might carry on in the next chunk, either right at the end of the buffer or cut off
+                    # part way (0. then 1 decodes as 0, ending before the .). Nothing valid follows a number with these.
+                    if at_end or ((end < len(buffer)) and (buffer[end] not in number_characters)):
+                        position = end
+                        return value
+                except json.JSONDecodeError:
+                    if at_end: raise
+                # Read at least as much as is held already, so long values don't get re-parsed over and over
+                read_more(max(chunk_size, len(buffer) - position))
+
+        def expect(character:str) -> None:
+            nonlocal position
+            token = next_token()
+            if token != character:
+                raise json.JSONDecodeError(f"Expecting '{character}'", buffer, position)
+            position += 1
+
+        expect("{")
+        if next_token() == "}": return
+        while True:
+            key = decode_next()
+            expect(":")
+            next_token()
+            value = decode_next()
+            if (fields != None) and isinstance(value, dict):
+                value = {field: value[field] for field in fields if field in value}
+            yield key, value
+            token = next_token()
+            position += 1
+            if token == "}": return
+            if token != ",":
+                raise json.JSONDecodeError("Expecting ',' delimiter", buffer, position - 1)
+            next_token()
+
 def write_file_contents(file_path:str|Path,
                         contents:str,
                         write_mode = "w") -> None:
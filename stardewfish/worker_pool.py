@@ -0,0 +1,63 @@
+"""
+File which holds the shared worker pool, for splitting up heavier jobs (like big batches of probability lists) across processes.
+The pool is only started the first time it's needed, then kept around and reused until shutdown_pool is called or the program exits.
+Copyright (C) 2024 Romayne (Contact @ https://github.com/MyNameIsRomayne)
+"""
+
+import atexit
+import multiprocessing
+import os
+
+# The pool itself, and how many workers it was started with. None until get_pool is first called.
+_pool = None
+_pool_workers:int = 0
+
+def get_worker_count() -> int:
+    """
+    Get how many workers the pool should use. Uses config.WORKERS, or every core if that isn't above 0.
+    config is only imported here, so importing this file doesn't need the config files to be set up.
+    """
+    import config
+    if config.WORKERS > 0:
+        return config.WORKERS
+    return os.cpu_count() or 1
+
+def get_pool():
+    """
+    Get the shared pool, starting it if it isn't running yet.
+    If the configured worker count changed since it was started, the old one is shut down and a new one started.
+    """
+    global _pool, _pool_workers
+    workers = get_worker_count()
+    if (_pool != None) and (_pool_workers != workers):
+        shutdown_pool()
+    if _pool == None:
+        _pool = multiprocessing.Pool(processes=workers)
+        _pool_workers = workers
+    return _pool
+
+def shutdown_pool() -> None:
+    """Close the shared pool (if any) and wait for its workers to exit."""
+    global _pool, _pool_workers
+    if _pool == None:
+        return
+    _pool.close()
+    _pool.join()
+    _pool = None
+    _pool_workers = 0
+
+def should_parallelize() -> bool:
+    """Whether work can be handed off to the pool here. Not from inside a worker, and not with only one worker."""
+    return (multiprocessing.parent_process() == None) and (get_worker_count() > 1)
+
+def run_chunks(func, chunk_args:list[tuple]) -> list:
+    """
+    Run func once per tuple of args in chunk_args across the pool, and return the results in the same order.
+    If there is only one chunk, it just gets run here instead.
+    """
+    if len(chunk_args) == 1:
+        return [func(*chunk_args[0])]
+    return get_pool().starmap(func, chunk_args)
+
+# Make sure workers don't outlive us
+atexit.register(shutdown_pool)